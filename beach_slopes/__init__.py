@@ -0,0 +1,54 @@
+"""
+Beach slopes from LiDAR surveys and DEMs.
+
+The modules only define functions: importing the package reads no data and
+draws nothing. The common entry points are available from the package itself
+and load their module (and its dependencies) on first use:
+
+    from beach_slopes import import_lidar_las, transform_coordinates, build_transects
+    from beach_slopes import plot_x_depth_transects
+
+Optional heavy dependencies (laspy, pyproj, scipy, GDAL, matplotlib) are
+imported inside the functions that need them.
+"""
+import importlib
+
+# public name -> submodule defining it
+_EXPORTS = {
+    "RotatedWindow": "lidar_io",
+    "PointFilter": "lidar_io",
+    "BARE_EARTH_CLASSES": "lidar_io",
+    "import_lidar_las": "lidar_io",
+    "iter_lidar_las": "lidar_io",
+    "import_lidar_tiles": "lidar_tiles",
+    "rotate_coordinates": "coordinates",
+    "transform_coordinates": "coordinates",
+    "build_transects": "transects",
+    "load_transects": "transect_cache",
+    "slope_table": "slopes",
+    "zone_masks": "zones",
+    "SANDY_BEACH_ZONES": "zones",
+    "bootstrap_slopes": "bootstrap",
+    "grid_profiles": "profiles",
+    "smooth_profiles": "profiles",
+    "plot_x_depth_transects": "plotting",
+    "plot_point_map": "plotting",
+    "grid_points": "gridding",
+    "grid_lidar_las": "gridding",
+    "FigureJob": "figures",
+    "render_figures": "figures",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
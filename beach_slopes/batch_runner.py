@@ -0,0 +1,271 @@
+"""
+Run the transect slope pipeline for several survey sites in parallel.
+
+Each site in a JSON manifest gets its transects (through the transect cache),
+per-transect and pooled zone slopes, and a <site>_slopes.csv in its output
+directory. Sites run in a bounded process pool, optionally with a per-site
+memory cap, and every site's table is combined into one slopes.csv at the end.
+
+    python -m beach_slopes.batch_runner sites.json --workers 3
+
+Manifest layout (see sites.json):
+
+    {
+        "output_dir": "/path/to/figures",
+        "sites": [
+            {
+                "name": "pendleton",
+                "las": "/path/to/survey.las",
+                "new_origin_north": 3678000, "new_origin_east": 460500, "theta_deg": 35,
+                "y_min": 7100, "y_max": 7400, "y_transect_width": 1, "y_transect_gap": 20,
+                "mirror_x": true,
+                "zones": "sandy_beach",
+                "slope_method": "theil_sen",
+                "bootstrap": 2000,
+                "bootstrap_workers": 2,
+                "point_filter": {"classifications": [2, 29, 40]},
+                "memory_limit_mb": 8000,
+                "output_dir": "/optional/per-site/dir",
+                "figures": [
+                    {"kind": "transects", "name": "beach", "title": "Pendleton beach transects",
+                     "fit_x_range": [-100, 65], "xlim": [-150, 100], "ylim": [-5, 6]},
+                    {"kind": "anatomy", "name": "transect_2", "transect_id": 2}
+                ]
+            }
+        ]
+    }
+
+zones is either "sandy_beach" (zones.SANDY_BEACH_ZONES) or a list of
+{"name", "x_range", "elevation_range"} objects. point_filter holds the
+lidar_io.PointFilter fields to apply while reading the LAS file, and
+slope_method one of slopes.SLOPE_METHODS (default "ols"). With bootstrap set
+to a number of replicates, the pooled zone slopes also get transect-bootstrap
+confidence intervals in <site>_bootstrap.csv, fit with the same slope_method
+(a robust method refits every replicate, so expect it to take far longer than
+"ols" for the same number of replicates). The replicates run on
+bootstrap_workers threads, by default the CPUs left to each site process
+(one per site when every CPU runs a site). figures lists figure jobs
+(figures.FIGURE_KINDS and their options) drawn from the site's cached
+transects once every site is done, all in one process pool, into
+<output_dir>/figures/<site>/<kind>_<name>.png; their fit lines and zone
+slopes use the site's zones and slope_method unless a figure sets its own.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+import pandas as pd
+
+from .lidar_io import PointFilter
+from .bootstrap import bootstrap_slopes
+from .figures import FigureJob, render_figures
+from .slopes import slope_table
+from .transect_cache import load_transects, transect_cache_path
+from .zones import SANDY_BEACH_ZONES, Zone, zone_masks
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ZONE_PRESETS = {"sandy_beach": SANDY_BEACH_ZONES}
+
+
+def parse_zones(spec) -> List[Zone]:
+    """Zone list from a manifest entry: a preset name or a list of zone objects."""
+    if spec is None:
+        return [Zone("all")]
+    if isinstance(spec, str):
+        return ZONE_PRESETS[spec]
+    return [
+        Zone(
+            zone["name"],
+            x_range=tuple(zone["x_range"]) if zone.get("x_range") else None,
+            elevation_range=tuple(zone["elevation_range"]) if zone.get("elevation_range") else None,
+        )
+        for zone in spec
+    ]
+
+
+def parse_point_filter(spec) -> Optional[PointFilter]:
+    """PointFilter from a manifest entry, or None to keep every return."""
+    if spec is None:
+        return None
+    spec = dict(spec)
+    for field in ("classifications", "return_numbers"):
+        if spec.get(field) is not None:
+            spec[field] = tuple(spec[field])
+    return PointFilter(**spec)
+
+
+def _limit_memory(memory_limit_mb: Optional[float]) -> None:
+    """Cap this worker's address space so one huge site fails instead of the machine."""
+    if resource is None or not hasattr(resource, "RLIMIT_AS"):
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    soft = hard if memory_limit_mb is None else int(memory_limit_mb * 1024 * 1024)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _transect_args(site: Dict[str, Any]) -> Dict[str, Any]:
+    """load_transects / transect_cache_path arguments of a manifest site."""
+    return dict(
+        las_filename=site["las"],
+        new_origin_north=site["new_origin_north"],
+        new_origin_east=site["new_origin_east"],
+        theta_deg=site["theta_deg"],
+        y_min=site["y_min"],
+        y_max=site["y_max"],
+        y_transect_width=site["y_transect_width"],
+        y_transect_gap=site["y_transect_gap"],
+        cache_dir=site.get("cache_dir"),
+        point_filter=parse_point_filter(site.get("point_filter")),
+    )
+
+
+def figure_jobs(site: Dict[str, Any]) -> List[FigureJob]:
+    """FigureJobs of a manifest site, reading its transects from the cache.
+
+    Fits drawn in the figures default to the site's own zones and
+    slope_method, so they agree with <site>_slopes.csv; a figure may still
+    set its own (zones in the manifest layout).
+    """
+    data = transect_cache_path(**_transect_args(site))
+    method = site.get("slope_method", "ols")
+    site_options = {
+        "transects": {"method": method},
+        "anatomy": {"zones": parse_zones(site.get("zones")), "method": method},
+    }
+    jobs = []
+    for spec in site.get("figures", []):
+        options = {key: value for key, value in spec.items() if key not in ("kind", "name", "figsize")}
+        if "zones" in options:
+            options["zones"] = parse_zones(options["zones"])
+        for key, value in site_options.get(spec["kind"], {}).items():
+            options.setdefault(key, value)
+        jobs.append(FigureJob(
+            spec["kind"], site["name"], spec["name"], data, options,
+            mirror_x=site.get("mirror_x", False),
+            figsize=tuple(spec.get("figsize", (6.4, 4.8))),
+        ))
+    return jobs
+
+
+def run_site(site: Dict[str, Any], output_dir: str, bootstrap_workers: int = 1) -> pd.DataFrame:
+    """Transects and zone slopes for one manifest site; writes <name>_slopes.csv.
+
+    Args:
+        site: one entry of the manifest "sites" list
+        output_dir: manifest-level output directory, used unless the site sets its own
+        bootstrap_workers: bootstrap threads, unless the site sets bootstrap_workers
+
+    Returns:
+        pd.DataFrame of per-transect and pooled zone fits with a site column.
+        Pooled rows (every transect together) have an empty transect_id.
+    """
+    _limit_memory(site.get("memory_limit_mb"))
+
+    df = load_transects(**_transect_args(site))
+    if site.get("mirror_x", False):
+        # cross-shore distance increases offshore, to match the east coast sites
+        df["rotated_x"] = df["rotated_x"] * -1
+
+    masks = zone_masks(df, parse_zones(site.get("zones")))
+    method = site.get("slope_method", "ols")
+    table = pd.concat(
+        [slope_table(df, masks, method=method), slope_table(df, masks, by=None, method=method)],
+        ignore_index=True,
+    )
+    table["transect_id"] = table["transect_id"].astype("Int64")
+    table.insert(0, "site", site["name"])
+
+    site_dir = site.get("output_dir", output_dir)
+    os.makedirs(site_dir, exist_ok=True)
+    table.to_csv(os.path.join(site_dir, f"{site['name']}_slopes.csv"), index=False)
+    if site.get("bootstrap"):
+        intervals = bootstrap_slopes(
+            df, masks, n_boot=site["bootstrap"], method=method,
+            workers=site.get("bootstrap_workers", bootstrap_workers),
+        )
+        intervals.insert(0, "site", site["name"])
+        intervals.to_csv(os.path.join(site_dir, f"{site['name']}_bootstrap.csv"), index=False)
+    return table
+
+
+def run_manifest(
+    manifest_filename: str,
+    workers: Optional[int] = None
+) -> pd.DataFrame:
+    """Process every site in a manifest across a process pool.
+
+    Args:
+        manifest_filename: path to the JSON site manifest
+        workers: maximum number of worker processes, default one per site up to
+            the CPU count (and one per CPU for the figures)
+
+    Returns:
+        pd.DataFrame with every site's slope table, also written to
+        <output_dir>/slopes.csv. Sites that fail are reported and left out,
+        and so are their figures.
+    """
+    with open(manifest_filename) as f:
+        manifest = json.load(f)
+    sites = manifest["sites"]
+    output_dir = manifest.get("output_dir", ".")
+    site_workers = workers
+    if site_workers is None:
+        site_workers = min(len(sites), os.cpu_count() or 1)
+
+    tables = {}
+    # share the CPUs between the site processes instead of each one using all of them
+    bootstrap_workers = max(1, (os.cpu_count() or 1) // max(site_workers, 1))
+    with ProcessPoolExecutor(max_workers=max(site_workers, 1)) as pool:
+        futures = {pool.submit(run_site, site, output_dir, bootstrap_workers): site["name"] for site in sites}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                tables[name] = future.result()
+                print(f'{name}: done')
+            except Exception as error:
+                print(f'{name}: failed with {error!r}')
+
+    failed = [site["name"] for site in sites if site["name"] not in tables]
+    if failed:
+        print('failed sites:', ', '.join(failed))
+
+    jobs = [job for site in sites if site["name"] in tables for job in figure_jobs(site)]
+    if jobs:
+        rendered = render_figures(jobs, os.path.join(output_dir, "figures"), workers=workers)
+        print(f'figures: {sum(path is not None for path in rendered)} of {len(jobs)} rendered')
+    if not tables:
+        return pd.DataFrame()
+
+    # keep manifest order regardless of which site finished first
+    slopes = pd.concat(
+        [tables[site["name"]] for site in sites if site["name"] in tables],
+        ignore_index=True,
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    slopes.to_csv(os.path.join(output_dir, "slopes.csv"), index=False)
+    return slopes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("manifest", help="JSON site manifest")
+    parser.add_argument("--workers", type=int, default=None, help="maximum worker processes")
+    args = parser.parse_args(argv)
+
+    slopes = run_manifest(args.manifest, args.workers)
+    with open(args.manifest) as f:
+        names = {site["name"] for site in json.load(f)["sites"]}
+    finished = set(slopes.site) if len(slopes) else set()
+    return 0 if names <= finished else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
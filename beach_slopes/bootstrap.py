@@ -0,0 +1,257 @@
+"""
+Bootstrap confidence intervals for pooled zone slopes.
+
+Points along one transect are not independent, so the resampling unit is the
+transect: each bootstrap replicate draws transects with replacement and refits
+the pooled line of every zone. A least-squares line only needs five sums (n,
+sum x, sum y, sum x^2, sum xy), so those are computed per transect once. A
+replicate is then its transect counts times that (transects x 5) table, and a
+chunk of replicates is one matrix product followed by the normal equations.
+
+The robust estimators of slopes.SLOPE_METHODS have no such shortcut: with
+method="theil_sen", "huber" or "ransac" the points of every replicate's
+transects are gathered and the chunk is refit in one batched estimator call,
+each replicate as its own group. That costs a pass over the resampled points
+per chunk, so chunks are kept to about _MAX_RESAMPLED_POINTS points.
+
+Chunks run on a thread pool (numpy releases the GIL in the matrix products),
+each with its own random stream, so the intervals do not depend on how many
+workers were used.
+
+    ci = bootstrap_slopes(df, zone_masks(df, SANDY_BEACH_ZONES), n_boot=5000)
+    ci = bootstrap_slopes(df, zone_masks(df, SANDY_BEACH_ZONES), n_boot=1000, method="theil_sen")
+"""
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Mapping, Optional
+import numpy as np
+import pandas as pd
+
+from .slopes import SLOPE_METHODS
+
+# replicates per chunk (and per matrix product)
+_CHUNK_SIZE = 500
+# resampled points per chunk of a robust refit
+_MAX_RESAMPLED_POINTS = 5_000_000
+
+
+def _transect_sums(
+    x: np.ndarray,
+    y: np.ndarray,
+    codes: np.ndarray,
+    n_transects: int,
+    x_center: float,
+    y_center: float
+) -> np.ndarray:
+    """(n_transects, 5) table of n, sum dx, sum dy, sum dx^2, sum dx*dy around the centers."""
+    dx = x - x_center
+    dy = y - y_center
+    return np.column_stack([
+        np.bincount(codes, minlength=n_transects),
+        np.bincount(codes, weights=dx, minlength=n_transects),
+        np.bincount(codes, weights=dy, minlength=n_transects),
+        np.bincount(codes, weights=dx * dx, minlength=n_transects),
+        np.bincount(codes, weights=dx * dy, minlength=n_transects),
+    ]).astype(np.float64)
+
+
+def _pooled_fit(sums: np.ndarray):
+    """Slope and (centered) intercept from rows of summed normal-equation terms."""
+    n, sx, sy, sxx, sxy = (sums[..., k] for k in range(5))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (sxy - sx * sy / n) / (sxx - sx * sx / n)
+        intercept = sy / n - slope * sx / n
+    return slope, intercept
+
+
+def _replicate_chunk(sums: np.ndarray, n_replicates: int, seed_sequence) -> np.ndarray:
+    """Slopes and intercepts of n_replicates transect resamples, for every zone.
+
+    Args:
+        sums: (n_zones, n_transects, 5) per-transect sums
+
+    Returns:
+        (2, n_replicates, n_zones) array of slopes and centered intercepts
+    """
+    rng = np.random.default_rng(seed_sequence)
+    n_transects = sums.shape[1]
+    counts = rng.multinomial(n_transects, np.full(n_transects, 1.0 / n_transects), size=n_replicates)
+    # (n_zones, n_replicates, 5) pooled sums of every replicate
+    replicate_sums = np.matmul(counts.astype(np.float64), sums)
+    slope, intercept = _pooled_fit(replicate_sums)
+    return np.stack((slope.T, intercept.T))
+
+
+def _resampled_rows(counts: np.ndarray, starts: np.ndarray, lengths: np.ndarray):
+    """Rows of every replicate's resample, and the replicate of each row.
+
+    Args:
+        counts: (n_replicates, n_transects) times each transect is drawn
+        starts: first row of each transect in transect-sorted point arrays
+        lengths: number of points of each transect
+    """
+    n_replicates, n_transects = counts.shape
+    flat_counts = counts.ravel()
+    draws = np.repeat(np.tile(np.arange(n_transects), n_replicates), flat_counts)
+    replicate = np.repeat(np.repeat(np.arange(n_replicates), n_transects), flat_counts)
+    sizes = lengths[draws]
+    offsets = starts[draws] - (np.cumsum(sizes) - sizes)
+    return np.repeat(offsets, sizes) + np.arange(sizes.sum()), np.repeat(replicate, sizes)
+
+
+def _refit_chunk(
+    zone_points: list,
+    n_transects: int,
+    n_replicates: int,
+    seed_sequence,
+    estimator,
+    method_kwargs: dict
+) -> np.ndarray:
+    """Slopes and intercepts of n_replicates transect resamples, refit with estimator.
+
+    Args:
+        zone_points: per zone, (x, y, starts, lengths) with x and y sorted by transect
+
+    Returns:
+        (2, n_replicates, n_zones) array of slopes and intercepts
+    """
+    rng = np.random.default_rng(seed_sequence)
+    counts = rng.multinomial(n_transects, np.full(n_transects, 1.0 / n_transects), size=n_replicates)
+    result = np.full((2, n_replicates, len(zone_points)), np.nan)
+    for k, (x, y, starts, lengths) in enumerate(zone_points):
+        if len(x) == 0:
+            continue
+        rows, replicate = _resampled_rows(counts, starts, lengths)
+        fits = estimator(x[rows], y[rows], replicate, n_replicates, **method_kwargs)
+        result[0, :, k] = fits.slope.to_numpy()
+        result[1, :, k] = fits.intercept.to_numpy()
+    return result
+
+
+def bootstrap_slopes(
+    df: pd.DataFrame,
+    zones: Optional[Mapping[str, np.ndarray]] = None,
+    n_boot: int = 2000,
+    confidence: float = 0.95,
+    by: str = "transect_id",
+    x: str = "rotated_x",
+    y: str = "elevation_m",
+    seed: int = 0,
+    workers: Optional[int] = None,
+    method: str = "ols",
+    **method_kwargs
+) -> pd.DataFrame:
+    """Pooled slope of every zone with transect-bootstrap intervals.
+
+    Args:
+        df: transect frame from build_transects
+        zones: zone name -> boolean mask over df rows, default fits all rows as "all"
+        n_boot: number of bootstrap replicates
+        confidence: coverage of the percentile intervals
+        by: column identifying the resampled units (transects)
+        x: column to use as the independent variable
+        y: column to use as the dependent variable
+        seed: random seed; results are the same for any number of workers
+        workers: threads used for the replicates, default one per CPU
+        method: "ols" (least squares), "theil_sen", "huber" or "ransac", as
+            in slopes.slope_table
+        **method_kwargs: passed to the robust estimator, e.g. residual_threshold for ransac
+
+    Returns:
+        pd.DataFrame with a row per zone that has any points and columns
+        zone, slope, slope_se, slope_low, slope_high, intercept,
+        intercept_low, intercept_high, n (points), n_transects and n_boot. slope and intercept are the fit to
+        the original data; the _se/_low/_high columns come from the replicates.
+    """
+    if n_boot < 2:
+        raise ValueError(f"n_boot must be at least 2, got {n_boot}")
+    if method not in SLOPE_METHODS:
+        raise ValueError(f"unknown slope method {method!r}, expected one of {sorted(SLOPE_METHODS)}")
+    if zones is None:
+        zones = {"all": np.ones(len(df), dtype=bool)}
+    zone_names = list(zones)
+    codes, labels = pd.factorize(df[by], sort=True)
+    x_values = df[x].to_numpy(dtype=np.float64)
+    y_values = df[y].to_numpy(dtype=np.float64)
+
+    if method == "ols":
+        # center each zone on its own means so the summed squares stay well conditioned
+        sums = np.empty((len(zone_names), len(labels), 5))
+        centers = np.zeros((len(zone_names), 2))
+        for k, zone in enumerate(zone_names):
+            mask = np.asarray(zones[zone], dtype=bool)
+            if mask.any():
+                centers[k] = x_values[mask].mean(), y_values[mask].mean()
+            sums[k] = _transect_sums(
+                x_values[mask], y_values[mask], codes[mask], len(labels), *centers[k]
+            )
+        transect_counts = sums[:, :, 0]
+
+        slope, intercept = _pooled_fit(sums.sum(axis=1))
+        # back from centered to original coordinates
+        intercept = intercept + centers[:, 1] - slope * centers[:, 0]
+        chunk_size = _CHUNK_SIZE
+
+        def run_chunk(size, chunk_seed):
+            chunk = _replicate_chunk(sums, size, chunk_seed)
+            chunk[1] = chunk[1] + centers[:, 1] - chunk[0] * centers[:, 0]
+            return chunk
+    else:
+        estimator = SLOPE_METHODS[method]
+        zone_points = []
+        transect_counts = np.empty((len(zone_names), len(labels)))
+        slope = np.full(len(zone_names), np.nan)
+        intercept = np.full(len(zone_names), np.nan)
+        for k, zone in enumerate(zone_names):
+            mask = np.asarray(zones[zone], dtype=bool)
+            zone_codes = codes[mask]
+            order = np.argsort(zone_codes, kind="stable")
+            lengths = np.bincount(zone_codes, minlength=len(labels))
+            zone_points.append((x_values[mask][order], y_values[mask][order], np.cumsum(lengths) - lengths, lengths))
+            transect_counts[k] = lengths
+            if mask.any():
+                fit = estimator(x_values[mask], y_values[mask], np.zeros(mask.sum(), dtype=np.intp), 1, **method_kwargs)
+                slope[k], intercept[k] = fit.slope.iloc[0], fit.intercept.iloc[0]
+
+        # a replicate resamples about as many points as the largest zone holds
+        largest_zone = max(int(transect_counts.sum(axis=1).max(initial=0)), 1)
+        chunk_size = max(1, min(_CHUNK_SIZE, _MAX_RESAMPLED_POINTS // largest_zone))
+
+        def run_chunk(size, chunk_seed):
+            return _refit_chunk(zone_points, len(labels), size, chunk_seed, estimator, method_kwargs)
+
+    if len(labels) == 0:
+        # no transects to resample: every zone is empty and left out of the table
+        boot_slope = boot_intercept = np.full((n_boot, len(zone_names)), np.nan)
+    else:
+        chunk_sizes = [min(chunk_size, n_boot - start) for start in range(0, n_boot, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            chunks = list(executor.map(run_chunk, chunk_sizes, seeds))
+        boot_slope, boot_intercept = np.concatenate(chunks, axis=1)
+
+    tail = 100 * (1 - confidence) / 2
+    with warnings.catch_warnings():
+        # a zone without points has only NaN replicates
+        warnings.simplefilter("ignore", RuntimeWarning)
+        slope_low, slope_high = np.nanpercentile(boot_slope, [tail, 100 - tail], axis=0)
+        intercept_low, intercept_high = np.nanpercentile(boot_intercept, [tail, 100 - tail], axis=0)
+        slope_se = np.nanstd(boot_slope, axis=0, ddof=1)
+
+    table = pd.DataFrame({
+        "zone": pd.Categorical(zone_names, categories=zone_names),
+        "slope": slope,
+        "slope_se": slope_se,
+        "slope_low": slope_low,
+        "slope_high": slope_high,
+        "intercept": intercept,
+        "intercept_low": intercept_low,
+        "intercept_high": intercept_high,
+        "n": transect_counts.sum(axis=1).astype(np.int64),
+        "n_transects": (transect_counts > 0).sum(axis=1),
+        "n_boot": n_boot,
+    })
+    return table.loc[table.n > 0].reset_index(drop=True)
@@ -0,0 +1,162 @@
+"""
+Shore-normal transects cast along a curving shoreline polyline.
+
+build_transects cuts transects out of one globally rotated frame, so on a long
+curving stretch they drift away from shore-normal. Here each transect gets its
+own normal, taken from a smoothed shoreline polyline (shoreline.shoreline_polyline)
+at its alongshore station.
+
+All points are assigned in one pass: a KD-tree over a densely resampled
+polyline gives each point its nearest shoreline position (its arc length),
+which picks the candidate transects; the exact along- and cross-shore offsets
+are then measured against each candidate's own normal line. Candidates are
+tried outwards from the foot until the offset leaves the transect, which is
+exact as long as the cross-shore range stays inside the shoreline's radius of
+curvature.
+"""
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+from .transects import transect_starts
+
+
+def resample_polyline(vertices: np.ndarray, spacing: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Evenly spaced points, unit tangents and arc lengths along a polyline.
+
+    Args:
+        vertices: (n, 2) array of easting, northing
+        spacing: distance (meters) between resampled points
+
+    Returns:
+        points (m, 2), tangents (m, 2) and arc length (m,) of each point
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    if len(vertices) < 2:
+        raise ValueError("a polyline needs at least two vertices")
+    segment_lengths = np.hypot(*np.diff(vertices, axis=0).T)
+    arc = np.concatenate(([0.0], np.cumsum(segment_lengths)))
+
+    arc_length = np.arange(0.0, arc[-1] + spacing / 2, spacing)
+    points = np.column_stack((
+        np.interp(arc_length, arc, vertices[:, 0]),
+        np.interp(arc_length, arc, vertices[:, 1]),
+    ))
+    tangents = np.gradient(points, axis=0) if len(points) > 1 else np.diff(vertices[:2], axis=0)
+    tangents /= np.hypot(tangents[:, 0], tangents[:, 1])[:, None]
+    return points, tangents, arc_length
+
+
+def build_curvilinear_transects(
+    df: pd.DataFrame,
+    polyline: np.ndarray,
+    y_min: float,
+    y_max: float,
+    y_transect_width: float,
+    y_transect_gap: float,
+    x_min: float = -1500.0,
+    x_max: float = 1500.0,
+    vertex_spacing: float = 1.0
+) -> pd.DataFrame:
+    """Locally shore-normal transects along a shoreline polyline.
+
+    Alongshore positions are arc length along the polyline, measured from its
+    first vertex. Transect k starts at station y_min + k*y_transect_gap and, as in
+    build_transects, keeps the points whose along-shore offset from that
+    station's normal line is between 0 and y_transect_width. For a straight
+    polyline the result is the same as transform_coordinates + build_transects.
+
+    Args:
+        df: dataframe with easting, northing and elevation_m columns
+        polyline: (n, 2) shoreline vertices (easting, northing), e.g. from
+            shoreline.shoreline_polyline
+        y_min: arc length of the first transect
+        y_max: transects start below this arc length
+        y_transect_width: how wide (in meters) do you want the transects to be?
+        y_transect_gap: how much space (in meters) between transects?
+        x_min: most negative cross-shore distance kept
+        x_max: most positive cross-shore distance kept
+        vertex_spacing: resampling step of the polyline for the KD-tree, meters
+
+    Returns:
+        pd.DataFrame with the rows of df in a transect, with rotated_x
+        (distance along the local normal) and rotated_y (arc length) replaced
+        by the curvilinear coordinates, and a transect_id column; sorted by
+        transect_id then rotated_x
+    """
+    points, tangents, arc_length = resample_polyline(polyline, vertex_spacing)
+    starts = transect_starts(y_min, y_max, y_transect_gap)
+    # transect ids follow build_transects; stations off the ends of the polyline stay empty
+    on_polyline = (starts >= arc_length[0]) & (starts <= arc_length[-1])
+
+    # station position and direction of every transect normal
+    station_points = np.column_stack((
+        np.interp(starts, arc_length, points[:, 0]),
+        np.interp(starts, arc_length, points[:, 1]),
+    ))
+    station_tangents = np.column_stack((
+        np.interp(starts, arc_length, tangents[:, 0]),
+        np.interp(starts, arc_length, tangents[:, 1]),
+    ))
+    station_tangents /= np.hypot(station_tangents[:, 0], station_tangents[:, 1])[:, None]
+    station_normals = np.column_stack((station_tangents[:, 1], -station_tangents[:, 0]))
+
+    from scipy.spatial import cKDTree
+
+    # nearest shoreline position for every point, skipping points too far out
+    easting = df.easting.to_numpy()
+    northing = df.northing.to_numpy()
+    reach = max(abs(x_min), abs(x_max)) + y_transect_width + vertex_spacing
+    distance, nearest = cKDTree(points).query(
+        np.column_stack((easting, northing)), distance_upper_bound=reach, workers=-1
+    )
+    near = np.flatnonzero(np.isfinite(distance))
+    foot_arc = arc_length[nearest[near]]
+
+    # candidate transects: walk back from the station at or before each point's
+    # foot, and forward from the next one, while the point's along-shore offset
+    # from the station's normal can still be in [0, y_transect_width]. The
+    # offset shrinks as the station moves forward, but on a curve it is
+    # stretched or squeezed by (radius + cross-shore distance) / radius, so a
+    # fixed window of stations around the foot misses points on the concave side
+    foot_station = np.floor((foot_arc - y_min) / y_transect_gap).astype(np.int64)
+    first_stations = ((-1, np.minimum(foot_station, len(starts) - 1)), (1, np.maximum(foot_station + 1, 0)))
+
+    rows, transect_ids, cross_shore, along_shore = [], [], [], []
+    for step, first_station in first_stations:
+        point_rows = near
+        candidate = first_station
+        while True:
+            valid = (candidate >= 0) & (candidate < len(starts))
+            valid[valid] = on_polyline[candidate[valid]]
+            point_rows = point_rows[valid]
+            candidate = candidate[valid]
+
+            offset_e = easting[point_rows] - station_points[candidate, 0]
+            offset_n = northing[point_rows] - station_points[candidate, 1]
+            along = offset_e * station_tangents[candidate, 0] + offset_n * station_tangents[candidate, 1]
+            cross = offset_e * station_normals[candidate, 0] + offset_n * station_normals[candidate, 1]
+            inside = (along >= 0) & (along <= y_transect_width) & (cross >= x_min) & (cross <= x_max)
+
+            rows.append(point_rows[inside])
+            transect_ids.append(candidate[inside])
+            cross_shore.append(cross[inside])
+            along_shore.append(starts[candidate[inside]] + along[inside])
+
+            more = along <= y_transect_width if step < 0 else along >= 0
+            point_rows = point_rows[more]
+            candidate = candidate[more] + step
+            if len(point_rows) == 0:
+                break
+
+    rows = np.concatenate(rows)
+    transect_ids = np.concatenate(transect_ids)
+    cross_shore = np.concatenate(cross_shore)
+    along_shore = np.concatenate(along_shore)
+    sort_order = np.lexsort((rows, cross_shore, transect_ids))
+
+    transects_df = df.take(rows[sort_order])
+    transects_df["rotated_x"] = cross_shore[sort_order]
+    transects_df["rotated_y"] = along_shore[sort_order]
+    transects_df["transect_id"] = transect_ids[sort_order]
+    return transects_df
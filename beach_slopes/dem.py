@@ -0,0 +1,227 @@
+"""
+Shore-normal transects sampled from a gridded DEM (e.g. the NOAA CoNED GeoTIFF).
+
+Rather than ReadAsArray on the whole band, the transect sample points are
+mapped to pixel coordinates first and only the raster blocks they touch are
+read, each block once. Elevations are bilinearly interpolated between the four
+surrounding pixel centers, and the result has the same transect_id, rotated_x,
+rotated_y and elevation_m columns as build_transects, so a regional raster can
+go straight into slope_table. When the transects are laid out in a different
+CRS than the raster (say a UTM survey against a CoNED tile in another zone),
+pass crs and the sample points are reprojected in bulk before the lookup.
+
+    dem_df = extract_dem_transects(
+        'Data/socal_coned_Job822412/Job822412_socal_coned.tif',
+        new_origin_north=3678000, new_origin_east=460500, theta_deg=35,
+        y_min=4000, y_max=8000, y_transect_width=1, y_transect_gap=10,
+    )
+"""
+from typing import Callable, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .reprojection import reproject
+from .transects import transect_starts
+
+
+def transect_sample_points(
+    new_origin_north: float,
+    new_origin_east: float,
+    theta_deg: float,
+    y_min: float,
+    y_max: float,
+    y_transect_width: float,
+    y_transect_gap: float,
+    x_min: float,
+    x_max: float,
+    x_spacing: float,
+    y_spacing: float
+) -> pd.DataFrame:
+    """Regular sample grid covering every transect strip.
+
+    Each transect is sampled every x_spacing across the shore, on alongshore
+    lines every y_spacing from its start to start + y_transect_width.
+
+    Returns:
+        pd.DataFrame with transect_id, rotated_x, rotated_y, easting and
+        northing, sorted by transect_id then rotated_x
+    """
+    if x_spacing <= 0 or y_spacing <= 0:
+        raise ValueError("x_spacing and y_spacing must be positive")
+    starts = transect_starts(y_min, y_max, y_transect_gap)
+    cross_shore = np.arange(x_min, x_max + x_spacing / 2, x_spacing)
+    line_offsets = np.arange(0.0, y_transect_width + y_spacing / 2, y_spacing)
+    line_offsets = line_offsets[line_offsets <= y_transect_width]
+
+    transect_ids = np.repeat(np.arange(len(starts)), len(cross_shore) * len(line_offsets))
+    rotated_x = np.tile(np.repeat(cross_shore, len(line_offsets)), len(starts))
+    rotated_y = (starts[:, None] + np.tile(line_offsets, len(cross_shore))).ravel()
+
+    # inverse of rotate_coordinates
+    theta_rad = np.radians(theta_deg)
+    sin_theta = np.sin(theta_rad)
+    cos_theta = np.cos(theta_rad)
+    easting = new_origin_east + rotated_x * cos_theta - rotated_y * sin_theta
+    northing = new_origin_north + rotated_x * sin_theta + rotated_y * cos_theta
+    return pd.DataFrame({
+        "transect_id": transect_ids,
+        "rotated_x": rotated_x,
+        "rotated_y": rotated_y,
+        "easting": easting,
+        "northing": northing,
+    })
+
+
+def bilinear_sample(
+    read_window: Callable[[int, int, int, int], np.ndarray],
+    raster_shape: Tuple[int, int],
+    block_shape: Tuple[int, int],
+    col: np.ndarray,
+    row: np.ndarray,
+    nodata: Optional[float] = None
+) -> np.ndarray:
+    """Bilinear interpolation at fractional pixel positions, reading block by block.
+
+    Args:
+        read_window: read_window(xoff, yoff, xsize, ysize) returns that window
+            of the band as a (ysize, xsize) array, e.g. band.ReadAsArray
+        raster_shape: (rows, cols) of the band
+        block_shape: (rows, cols) of the band's natural blocks
+        col: fractional column of each sample (pixel edges at integers)
+        row: fractional row of each sample
+        nodata: band nodata value, treated as missing
+
+    Returns:
+        interpolated values; NaN where a neighbouring pixel is off the raster
+        or nodata
+    """
+    n_rows, n_cols = raster_shape
+    block_rows, block_cols = block_shape
+    # pixel centers sit at half-integers
+    u = np.asarray(col, dtype=np.float64) - 0.5
+    v = np.asarray(row, dtype=np.float64) - 0.5
+    values = np.full(len(u), np.nan)
+    finite = np.isfinite(u) & np.isfinite(v)
+    c0 = np.floor(u, where=finite, out=np.full(len(u), -1.0)).astype(np.int64)
+    r0 = np.floor(v, where=finite, out=np.full(len(v), -1.0)).astype(np.int64)
+    inside = finite & (c0 >= 0) & (r0 >= 0) & (c0 + 1 < n_cols) & (r0 + 1 < n_rows)
+    if not inside.any():
+        return values
+    samples = np.flatnonzero(inside)
+    fu = u[samples] - c0[samples]
+    fv = v[samples] - r0[samples]
+
+    # the four neighbours of every sample, stacked as corners x samples
+    corner_rows = r0[samples] + np.array([0, 0, 1, 1])[:, None]
+    corner_cols = c0[samples] + np.array([0, 1, 0, 1])[:, None]
+    corner_rows = corner_rows.ravel()
+    corner_cols = corner_cols.ravel()
+    n_block_cols = -(-n_cols // block_cols)
+    blocks = (corner_rows // block_rows) * n_block_cols + corner_cols // block_cols
+
+    # read every touched block once and gather its pixels
+    corner_values = np.empty(len(blocks))
+    order = np.argsort(blocks, kind="stable")
+    bounds = np.flatnonzero(np.diff(blocks[order])) + 1
+    for positions in np.split(order, bounds):
+        block = blocks[positions[0]]
+        yoff = (block // n_block_cols) * block_rows
+        xoff = (block % n_block_cols) * block_cols
+        window = read_window(
+            int(xoff), int(yoff),
+            int(min(block_cols, n_cols - xoff)), int(min(block_rows, n_rows - yoff)),
+        )
+        corner_values[positions] = window[corner_rows[positions] - yoff, corner_cols[positions] - xoff]
+    if nodata is not None:
+        corner_values[corner_values == nodata] = np.nan
+
+    z00, z01, z10, z11 = corner_values.reshape(4, -1)
+    values[samples] = (
+        z00 * (1 - fu) * (1 - fv)
+        + z01 * fu * (1 - fv)
+        + z10 * (1 - fu) * fv
+        + z11 * fu * fv
+    )
+    return values
+
+
+def extract_dem_transects(
+    filename: str,
+    new_origin_north: float,
+    new_origin_east: float,
+    theta_deg: float,
+    y_min: float,
+    y_max: float,
+    y_transect_width: float,
+    y_transect_gap: float,
+    x_min: float = -1500.0,
+    x_max: float = 1500.0,
+    x_spacing: Optional[float] = None,
+    y_spacing: Optional[float] = None,
+    band: int = 1,
+    crs=None
+) -> pd.DataFrame:
+    """Sample shore-normal transects from a DEM, reading only the blocks they cross.
+
+    The transect layout arguments mean the same as for transform_coordinates
+    and build_transects, in the raster's own (projected) coordinate system
+    unless crs is given.
+
+    Args:
+        filename: path to the DEM (any GDAL raster, e.g. GeoTIFF)
+        new_origin_north: location (in UTM) ideally along the shoreline
+        new_origin_east: location (in UTM) ideally along the shoreline
+        theta_deg: the angle that the shoreline sits at - degrees from true north
+        y_min: the minimum y coordinate that you want included in your beach section
+        y_max: the maximum y coordinate that you want included in your beach section
+        y_transect_width: how wide (in meters) do you want the transects to be?
+        y_transect_gap: how much space (in meters) between transects?
+        x_min: most negative cross-shore distance sampled
+        x_max: most positive cross-shore distance sampled
+        x_spacing: cross-shore sample spacing, defaults to the pixel size
+            (required with crs)
+        y_spacing: spacing of the sample lines within a transect, defaults to
+            the pixel size (required with crs)
+        band: raster band to sample
+        crs: CRS of the origin (and of the output easting/northing) when it
+            differs from the raster's
+
+    Returns:
+        pd.DataFrame with transect_id, rotated_x, rotated_y, easting, northing
+        and elevation_m, sorted by transect_id then rotated_x; samples that
+        fall off the raster or on nodata are dropped
+    """
+    from osgeo import gdal
+
+    ds = gdal.Open(filename, gdal.GA_ReadOnly)
+    if ds is None:
+        raise FileNotFoundError(f"could not open {filename}")
+    gt = ds.GetGeoTransform()
+    raster_band = ds.GetRasterBand(band)
+    pixel_size = min(np.hypot(gt[1], gt[4]), np.hypot(gt[2], gt[5]))
+    if crs is not None and (x_spacing is None or y_spacing is None):
+        # pixel size is in raster units, which need not be meters in crs
+        raise ValueError("pass x_spacing and y_spacing when crs is given")
+
+    samples = transect_sample_points(
+        new_origin_north, new_origin_east, theta_deg,
+        y_min, y_max, y_transect_width, y_transect_gap, x_min, x_max,
+        x_spacing or pixel_size, y_spacing or pixel_size,
+    )
+    inverse = gdal.InvGeoTransform(gt)
+    easting = samples.easting.to_numpy()
+    northing = samples.northing.to_numpy()
+    if crs is not None:
+        easting, northing = reproject(easting, northing, crs, ds.GetProjectionRef())
+    col = inverse[0] + inverse[1] * easting + inverse[2] * northing
+    row = inverse[3] + inverse[4] * easting + inverse[5] * northing
+
+    block_cols, block_rows = raster_band.GetBlockSize()
+    samples["elevation_m"] = bilinear_sample(
+        raster_band.ReadAsArray,
+        (ds.RasterYSize, ds.RasterXSize),
+        (block_rows, block_cols),
+        col, row,
+        nodata=raster_band.GetNoDataValue(),
+    )
+    return samples.loc[samples.elevation_m.notna()].reset_index(drop=True)
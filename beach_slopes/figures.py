@@ -0,0 +1,229 @@
+"""
+Render many figures in parallel worker processes.
+
+Every figure of a report (transect plots, point maps, beach anatomy plots) is
+described by a FigureJob and rendered by render_figures on a process pool
+running the headless Agg backend, without pyplot's global state. Each worker
+keeps one figure template (Figure, canvas and axes) per kind and clears and
+redraws it for every job, and reads each transect cache file once no matter
+how many figures use it. Output paths only depend on the job, so a rerun
+overwrites the same files whatever order the workers finish in:
+
+    jobs = [
+        FigureJob("transects", "pendleton", "beach", cache_path,
+                  {"title": "Pendleton beach transects", "fit_x_range": (-100, 65),
+                   "xlim": (-150, 100), "ylim": (-5, 6)}, mirror_x=True),
+        FigureJob("anatomy", "pendleton", "transect_2", cache_path, {"transect_id": 2}, mirror_x=True),
+    ]
+    paths = render_figures(jobs, "/path/to/figures", workers=8)
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from .plotting import draw_profile_anatomy, draw_x_depth_transects, plot_point_map
+from .profiles import grid_profiles, smooth_profiles
+from .slopes import slope_table
+from .transect_cache import read_transects
+from .zones import SANDY_BEACH_ZONES, zone_masks
+
+
+class FigureJob(NamedTuple):
+    """One figure to render.
+
+    kind is a key of FIGURE_KINDS and options are the keyword arguments of its
+    renderer. data is a transect frame or, cheaper for many jobs, the path of a
+    transect cache file (save_transects / load_transects), which is read once
+    per worker instead of being pickled with every job.
+    """
+    kind: str
+    site: str
+    name: str
+    data: Union[str, pd.DataFrame]
+    options: Optional[Dict[str, Any]] = None
+    mirror_x: bool = False
+    figsize: tuple = (6.4, 4.8)
+
+
+def figure_path(output_dir: str, job: FigureJob, fmt: str = "png") -> str:
+    """Output file of a job: <output_dir>/<site>/<kind>_<name>.<fmt>."""
+    def clean(part):
+        return re.sub(r"[^\w.-]+", "_", str(part))
+    return os.path.join(output_dir, clean(job.site), f"{clean(job.kind)}_{clean(job.name)}.{fmt}")
+
+
+@lru_cache(maxsize=8)
+def _cached_frame(path: str, mirror_x: bool) -> pd.DataFrame:
+    df = read_transects(path)
+    if mirror_x:
+        df["rotated_x"] = df["rotated_x"] * -1
+    return df
+
+
+def _job_frame(job: FigureJob) -> pd.DataFrame:
+    if isinstance(job.data, str):
+        return _cached_frame(job.data, job.mirror_x)
+    if job.mirror_x:
+        return job.data.assign(rotated_x=job.data["rotated_x"] * -1)
+    return job.data
+
+
+# (kind, figsize) -> (figure, axes, initial subplot params) of this worker
+_templates: Dict[tuple, tuple] = {}
+
+
+def _template(kind: str, figsize: tuple):
+    """This worker's reusable figure for a kind, cleared for the next job."""
+    key = (kind, tuple(figsize))
+    if key not in _templates:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        # tight layout as an engine is redone from scratch at every savefig,
+        # so a reused figure lays out exactly like a fresh one
+        figure = Figure(figsize=figsize, layout="tight" if kind == "anatomy" else None)
+        FigureCanvasAgg(figure)
+        if kind == "point_map":
+            axes = tuple(figure.subplots(1, 2, gridspec_kw={"width_ratios": [20, 1]}))
+        else:
+            axes = (figure.add_subplot(),)
+        subplot_params = {side: getattr(figure.subplotpars, side)
+                          for side in ("left", "right", "bottom", "top", "wspace", "hspace")}
+        _templates[key] = (figure, axes, subplot_params)
+    figure, axes, subplot_params = _templates[key]
+    for ax in axes:
+        ax.cla()
+    # undo the previous job's layout so every job starts from the same geometry
+    figure.subplots_adjust(**subplot_params)
+    return figure, axes
+
+
+def _render_transects(
+    axes,
+    df: pd.DataFrame,
+    title: str,
+    xlim,
+    ylim,
+    fit_x_range=None,
+    regression_slope: Optional[float] = None,
+    regression_intercept: Optional[float] = None,
+    dpi: float = 300,
+    method: str = "ols"
+) -> None:
+    """plot_x_depth_transects, fitting the line (with slope_table method) over fit_x_range unless it is given."""
+    if regression_slope is None:
+        low, high = fit_x_range if fit_x_range is not None else (-np.inf, np.inf)
+        mask = (df.rotated_x > low) & (df.rotated_x < high)
+        fit = slope_table(df, {"fit": mask.to_numpy()}, by=None, method=method).iloc[0]
+        regression_slope, regression_intercept = fit.slope, fit.intercept
+    draw_x_depth_transects(axes[0], df, title, regression_slope, regression_intercept, xlim, ylim, dpi=dpi)
+
+
+def _render_point_map(
+    axes,
+    df: pd.DataFrame,
+    title: str = "",
+    xlabel: str = "Rotated coords Cross-shore (m)",
+    ylabel: str = "Rotated coords Along-shore (m)",
+    **map_options
+) -> None:
+    """plot_point_map with a title, on the template's map and colorbar axes."""
+    map_options.setdefault("vmin", -4)
+    map_options.setdefault("vmax", 4)
+    plot_point_map(df, ax=axes[0], colorbar_ax=axes[1], **map_options)
+    axes[0].set_title(title)
+    axes[0].set_xlabel(xlabel)
+    axes[0].set_ylabel(ylabel)
+
+
+def _render_anatomy(
+    axes,
+    df: pd.DataFrame,
+    transect_id,
+    zones=SANDY_BEACH_ZONES,
+    spacing: float = 0.5,
+    window: float = 5.0,
+    max_gap: float = 5.0,
+    method: str = "ols",
+    **anatomy_options
+) -> None:
+    """draw_profile_anatomy of one smoothed transect with its pooled zone slopes (slope_table method)."""
+    profiles = smooth_profiles(
+        grid_profiles(df, spacing=spacing, method="linear", max_gap=max_gap), window=window)
+    zone_fits = slope_table(df, zone_masks(df, zones), by=None, method=method)
+    draw_profile_anatomy(
+        axes[0], profiles.x, profiles.elevation[profiles.row(transect_id)], zone_fits, **anatomy_options)
+
+
+# figure kind -> renderer(axes, df, **options)
+FIGURE_KINDS: Dict[str, Callable[..., None]] = {
+    "transects": _render_transects,
+    "point_map": _render_point_map,
+    "anatomy": _render_anatomy,
+}
+
+
+def render_figure(job: FigureJob, path: str, dpi: float = 300) -> str:
+    """Render one job to path with this process's template figure."""
+    if job.kind not in FIGURE_KINDS:
+        raise ValueError(f"unknown figure kind {job.kind!r}, expected one of {sorted(FIGURE_KINDS)}")
+    figure, axes = _template(job.kind, job.figsize)
+    figure.suptitle("")
+    options = dict(job.options or {})
+    if job.kind in ("transects", "point_map"):
+        options.setdefault("dpi", dpi)
+    FIGURE_KINDS[job.kind](axes, _job_frame(job), **options)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    figure.savefig(path, dpi=dpi)
+    return path
+
+
+def _init_worker() -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_figures(
+    jobs: Sequence[FigureJob],
+    output_dir: str,
+    workers: Optional[int] = None,
+    dpi: float = 300,
+    fmt: str = "png"
+) -> List[Optional[str]]:
+    """Render figure jobs across a process pool.
+
+    Args:
+        jobs: figures to render
+        output_dir: root of the output tree (see figure_path)
+        workers: maximum number of worker processes, default one per CPU
+        dpi: resolution of the saved figures
+        fmt: file format (extension) of the saved figures
+
+    Returns:
+        output path of every job, in job order; None for jobs that failed
+        (their errors are printed)
+    """
+    paths = [figure_path(output_dir, job, fmt) for job in jobs]
+    if len(set(paths)) != len(paths):
+        duplicates = sorted({path for path in paths if paths.count(path) > 1})
+        raise ValueError(f"figure jobs share output paths: {', '.join(duplicates)}")
+    if not jobs:
+        return []
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    results: List[Optional[str]] = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(render_figure, job, path, dpi): i for i, (job, path) in enumerate(zip(jobs, paths))}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as error:
+                print(f'{paths[i]}: failed with {error!r}')
+    return results
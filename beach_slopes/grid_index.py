@@ -0,0 +1,108 @@
+"""
+Grid (bucket) index over rotated shore-normal coordinates.
+
+Points are bucketed into square cells of rotated_x/rotated_y once, and stored
+cell by cell in a single permutation array. Cells are numbered row by row, so
+every alongshore row of a query rectangle is one contiguous slice of that
+array. A window or transect-strip query only touches the cells it overlaps and
+then checks the exact bounds on those candidates, so its cost scales with the
+points returned rather than the points in the survey.
+
+    index = GridIndex.from_frame(df)
+    section = df.take(index.window(x_min=-300, x_max=90, y_min=6500, y_max=7200))
+"""
+import numpy as np
+import pandas as pd
+
+
+class GridIndex:
+    """Bucket index of rotated_x/rotated_y for rectangular window queries.
+
+    Args:
+        rotated_x: cross-shore coordinate of every point
+        rotated_y: alongshore coordinate of every point
+        cell_size: cell edge length in meters; roughly the size of the
+            narrowest query (e.g. transect width) works well
+    """
+
+    def __init__(self, rotated_x: np.ndarray, rotated_y: np.ndarray, cell_size: float = 5.0):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.rotated_x = np.asarray(rotated_x)
+        self.rotated_y = np.asarray(rotated_y)
+        self.cell_size = float(cell_size)
+
+        if len(self.rotated_x):
+            self.x0 = float(np.min(self.rotated_x))
+            self.y0 = float(np.min(self.rotated_y))
+            self.nx = int((np.max(self.rotated_x) - self.x0) // self.cell_size) + 1
+            self.ny = int((np.max(self.rotated_y) - self.y0) // self.cell_size) + 1
+        else:
+            self.x0 = self.y0 = 0.0
+            self.nx = self.ny = 0
+
+        cells = self._cell_ids(self.rotated_x, self.rotated_y)
+        self.order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.nx * self.ny)
+        self.cell_start = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.cell_start[1:])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, cell_size: float = 5.0) -> "GridIndex":
+        """Index a frame that has been through transform_coordinates."""
+        return cls(df.rotated_x.to_numpy(), df.rotated_y.to_numpy(), cell_size)
+
+    def _cell_ids(self, rotated_x: np.ndarray, rotated_y: np.ndarray) -> np.ndarray:
+        ix = ((rotated_x - self.x0) // self.cell_size).astype(np.int64)
+        iy = ((rotated_y - self.y0) // self.cell_size).astype(np.int64)
+        # guard against the max coordinate rounding into a cell past the edge
+        np.clip(ix, 0, max(self.nx - 1, 0), out=ix)
+        np.clip(iy, 0, max(self.ny - 1, 0), out=iy)
+        return iy * self.nx + ix
+
+    def _cell_range(self, low: float, high: float, origin: float, n_cells: int):
+        first = int(max((low - origin) // self.cell_size, 0)) if np.isfinite(low) else 0
+        last = int(min((high - origin) // self.cell_size, n_cells - 1)) if np.isfinite(high) else n_cells - 1
+        return first, last
+
+    def window(
+        self,
+        x_min: float = -np.inf,
+        x_max: float = np.inf,
+        y_min: float = -np.inf,
+        y_max: float = np.inf
+    ) -> np.ndarray:
+        """Positions of the points with x_min <= rotated_x <= x_max and y_min <= rotated_y <= y_max.
+
+        Returns:
+            sorted row positions, ready for df.take
+        """
+        if self.nx == 0 or x_min > x_max or y_min > y_max:
+            return np.empty(0, dtype=np.int64)
+        ix0, ix1 = self._cell_range(x_min, x_max, self.x0, self.nx)
+        iy0, iy1 = self._cell_range(y_min, y_max, self.y0, self.ny)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.int64)
+
+        # each grid row of the window is one contiguous run of self.order
+        row_cells = np.arange(iy0, iy1 + 1) * self.nx
+        first = self.cell_start[row_cells + ix0]
+        last = self.cell_start[row_cells + ix1 + 1]
+        counts = last - first
+        positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - first, counts)
+        candidates = self.order[positions]
+
+        x = self.rotated_x[candidates]
+        y = self.rotated_y[candidates]
+        inside = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        return np.sort(candidates[inside])
+
+    def strip(
+        self,
+        y_min: float,
+        y_max: float,
+        x_min: float = -np.inf,
+        x_max: float = np.inf
+    ) -> np.ndarray:
+        """Positions of the points in an alongshore strip, i.e. one transect."""
+        return self.window(x_min, x_max, y_min, y_max)
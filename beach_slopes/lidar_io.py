@@ -0,0 +1,395 @@
+"""
+Chunked reading of lidar (.las / .laz) point data.
+
+laspy.read pulls an entire survey into memory before we can touch it, and the
+vstack/DataFrame steps that follow make two more copies of every point. These
+readers walk the file in fixed-size chunks instead so that peak memory stays
+bounded by the chunk size (plus whatever the caller decides to keep).
+
+Most runs only look at a small stretch of beach, so the readers also take a
+UTM bounding box, a window in the rotated shore-normal frame and an elevation
+range. Points outside them are dropped chunk by chunk, before any DataFrame is
+built.
+
+A PointFilter drops points by classification code, return number and the
+withheld/overlap flags. It is applied first, to the packed integer fields
+before anything is unpacked or scaled, so on a topobathy survey the water
+surface, noise and vegetation returns never cost any memory.
+
+Compressed .laz files go through the same readers. open_las picks the
+multi-threaded lazrs backend when it is installed, which decompresses the LAZ
+chunks that make up each read on all cores, and only the coordinate layers are
+decompressed.
+
+laspy itself is only imported when a file is opened, so importing this module
+stays cheap.
+
+With target_crs the points are also reprojected chunk by chunk (see
+reprojection.reproject_frame), from the CRS stored in the file header unless
+source_crs is given.
+"""
+from typing import Callable, Iterator, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .coordinates import rotate_coordinates
+from .reprojection import reproject_frame
+
+# ~120 MB of float64 coordinates per chunk
+DEFAULT_CHUNK_SIZE = 5_000_000
+
+LIDAR_COLUMNS = ["easting", "northing", "elevation_m"]
+
+# ASPRS ground, submerged topography (NOAA/USACE topobathy) and bathymetric bottom
+BARE_EARTH_CLASSES = (2, 29, 40)
+
+# legacy point formats (0-5) have no overlap flag and use class 12 instead
+_LEGACY_OVERLAP_CLASS = 12
+
+
+class RotatedWindow(NamedTuple):
+    """Rectangle in the shore-normal frame used by transform_coordinates.
+
+    new_origin_north, new_origin_east and theta_deg take the same values you
+    would pass to transform_coordinates. The limits are inclusive and default
+    to unbounded, so RotatedWindow(3678000, 460500, 35, y_min=7100, y_max=7400)
+    keeps an alongshore stretch at every cross-shore distance.
+    """
+    new_origin_north: float
+    new_origin_east: float
+    theta_deg: float
+    x_min: float = -np.inf
+    x_max: float = np.inf
+    y_min: float = -np.inf
+    y_max: float = np.inf
+
+    def contains(self, easting: np.ndarray, northing: np.ndarray) -> np.ndarray:
+        """Boolean mask of the UTM points that fall inside the window."""
+        rotated_x, rotated_y = rotate_coordinates(
+            easting, northing, self.new_origin_north, self.new_origin_east, self.theta_deg
+        )
+        inside = (rotated_x >= self.x_min) & (rotated_x <= self.x_max)
+        inside &= (rotated_y >= self.y_min) & (rotated_y <= self.y_max)
+        return inside
+
+
+class PointFilter(NamedTuple):
+    """Which returns to keep, by LAS classification and return fields.
+
+    PointFilter(classifications=BARE_EARTH_CLASSES) keeps ground and seafloor
+    points, PointFilter(last_return_only=True) the last return of every pulse.
+    Withheld and overlap points are dropped unless asked for.
+    """
+    classifications: Optional[Tuple[int, ...]] = None
+    return_numbers: Optional[Tuple[int, ...]] = None
+    last_return_only: bool = False
+    drop_withheld: bool = True
+    drop_overlap: bool = True
+
+
+def _point_filter_mask(points, point_filter: PointFilter) -> np.ndarray:
+    """Boolean mask of the chunk's points kept by point_filter.
+
+    Reads the packed bytes of the point records directly: bit_fields (return
+    number / number of returns) plus raw_classification for point formats
+    0-5, or classification and classification_flags for formats 6-10.
+    """
+    array = points.array
+    bit_fields = array["bit_fields"]
+    if "raw_classification" in array.dtype.names:
+        raw_classification = array["raw_classification"]
+        classification = raw_classification & 0x1F
+        withheld = (raw_classification & 0x80) != 0
+        overlap = classification == _LEGACY_OVERLAP_CLASS
+        return_number = bit_fields & 0x07
+        number_of_returns = (bit_fields >> 3) & 0x07
+    else:
+        flags = array["classification_flags"]
+        classification = array["classification"]
+        withheld = (flags & 0x04) != 0
+        overlap = (flags & 0x08) != 0
+        return_number = bit_fields & 0x0F
+        number_of_returns = bit_fields >> 4
+
+    keep = np.ones(len(bit_fields), dtype=bool)
+    if point_filter.classifications is not None:
+        # one table lookup instead of a comparison per class code
+        wanted = np.zeros(256, dtype=bool)
+        wanted[list(point_filter.classifications)] = True
+        keep &= wanted[classification]
+    if point_filter.return_numbers is not None:
+        wanted = np.zeros(16, dtype=bool)
+        wanted[list(point_filter.return_numbers)] = True
+        keep &= wanted[return_number]
+    if point_filter.last_return_only:
+        keep &= return_number == number_of_returns
+    if point_filter.drop_withheld:
+        keep &= ~withheld
+    if point_filter.drop_overlap:
+        keep &= ~overlap
+    return keep
+
+
+def _raw_range(low: float, high: float, scale: float, offset: float) -> Tuple[float, float]:
+    """Convert an inclusive range of scaled coordinates to raw integer units."""
+    return np.ceil((low - offset) / scale), np.floor((high - offset) / scale)
+
+
+def _header_overlaps(
+    header,
+    bbox: Optional[Tuple[float, float, float, float]],
+    elevation_range: Optional[Tuple[float, float]]
+) -> bool:
+    """Check the file's header bounds before reading any points."""
+    mins, maxs = header.mins, header.maxs
+    if bbox is not None:
+        min_easting, min_northing, max_easting, max_northing = bbox
+        if (maxs[0] < min_easting or mins[0] > max_easting
+                or maxs[1] < min_northing or mins[1] > max_northing):
+            return False
+    if elevation_range is not None:
+        if maxs[2] < elevation_range[0] or mins[2] > elevation_range[1]:
+            return False
+    return True
+
+
+def _chunk_selection(
+    points,
+    bbox: Optional[Tuple[float, float, float, float]],
+    rotated_window: Optional[RotatedWindow],
+    elevation_range: Optional[Tuple[float, float]],
+    point_filter: Optional[PointFilter] = None
+) -> Optional[np.ndarray]:
+    """Indices of the points in a chunk that pass every filter (None keeps all).
+
+    The point filter, bounding box and elevation range are tested against the
+    packed integer fields and raw X/Y/Z arrays, so no scaled copy of the chunk
+    is made for them. Only the points that survive those are scaled for the
+    rotated window test.
+    """
+    keep = None
+    if point_filter is not None:
+        keep = _point_filter_mask(points, point_filter)
+    if bbox is not None:
+        min_easting, min_northing, max_easting, max_northing = bbox
+        low, high = _raw_range(min_easting, max_easting, points.scales[0], points.offsets[0])
+        in_box = (points.X >= low) & (points.X <= high)
+        low, high = _raw_range(min_northing, max_northing, points.scales[1], points.offsets[1])
+        in_box &= (points.Y >= low) & (points.Y <= high)
+        keep = in_box if keep is None else keep & in_box
+    if elevation_range is not None:
+        low, high = _raw_range(*elevation_range, points.scales[2], points.offsets[2])
+        in_range = (points.Z >= low) & (points.Z <= high)
+        keep = in_range if keep is None else keep & in_range
+
+    index = None if keep is None else np.flatnonzero(keep)
+    if rotated_window is not None:
+        easting = _scaled(points, 0, index)
+        northing = _scaled(points, 1, index)
+        inside = rotated_window.contains(easting, northing)
+        index = np.flatnonzero(inside) if index is None else index[inside]
+    return index
+
+
+def _scaled(points, axis: int, index: Optional[np.ndarray] = None, out=None) -> np.ndarray:
+    """Scale one raw coordinate axis of a chunk, optionally for a subset of points."""
+    raw = (points.X, points.Y, points.Z)[axis]
+    if index is not None:
+        raw = raw[index]
+    out = np.multiply(raw, points.scales[axis], out=out)
+    out += points.offsets[axis]
+    return out
+
+
+def _points_to_frame(points, index: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Scale a laspy point chunk into an easting/northing/elevation_m frame.
+
+    The coordinates are written row by row into one (3, n) buffer and handed to
+    pandas transposed, which pandas keeps as its column block without copying.
+    """
+    count = len(points) if index is None else len(index)
+    coords = np.empty((3, count), dtype=np.float64)
+    for axis in range(3):
+        _scaled(points, axis, index, out=coords[axis])
+    return pd.DataFrame(coords.T, columns=LIDAR_COLUMNS, copy=False)
+
+
+def laz_fields(point_filter: Optional[PointFilter] = None):
+    """DecompressionSelection of the LAZ layers the readers use.
+
+    LAZ point formats 6-10 compress each field separately, so the ones never
+    read are skipped: only the coordinates (and return numbers), plus the
+    classification and flags when point_filter needs them.
+    """
+    import laspy
+    fields = laspy.DecompressionSelection.XY_RETURNS_CHANNEL | laspy.DecompressionSelection.Z
+    if point_filter is not None:
+        fields |= laspy.DecompressionSelection.CLASSIFICATION | laspy.DecompressionSelection.FLAGS
+    return fields
+
+
+def laz_backend():
+    """Fastest installed LAZ backend, preferring parallel lazrs (None if there is none)."""
+    import laspy
+    # laspy lists its backends fastest first: LazrsParallel, Lazrs, Laszip
+    for backend in laspy.LazBackend:
+        if backend.is_available():
+            return backend
+    return None
+
+
+def open_las(filename: str, fields=None):
+    """laspy.open for both .las and .laz, decompressing LAZ in parallel when possible.
+
+    fields is the DecompressionSelection of LAZ layers to decompress; the
+    default is laz_fields(), only the coordinates (and return numbers).
+    """
+    import laspy
+    if fields is None:
+        fields = laz_fields()
+    return laspy.open(filename, laz_backend=laz_backend(), decompression_selection=fields)
+
+
+def las_crs(header):
+    """CRS stored in a LAS header (WKT or GeoTIFF keys), or None if it has none."""
+    return header.parse_crs()
+
+
+def _source_crs(header, source_crs, target_crs):
+    if target_crs is None or source_crs is not None:
+        return source_crs
+    source_crs = las_crs(header)
+    if source_crs is None:
+        raise ValueError("the LAS header has no CRS, pass source_crs to reproject")
+    return source_crs
+
+
+def iter_lidar_las(
+    filename: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    rotated_window: Optional[RotatedWindow] = None,
+    elevation_range: Optional[Tuple[float, float]] = None,
+    target_crs=None,
+    source_crs=None,
+    point_filter: Optional[PointFilter] = None
+) -> Iterator[pd.DataFrame]:
+    """Stream lidar (.las) point data in UTM coordinates, chunk_size points at a time.
+
+    Each chunk has the same columns as import_lidar_las, so it can be passed
+    straight through transform_coordinates, any rotated_x/rotated_y clipping and
+    build_transects before the next chunk is read.
+
+    Args:
+        filename: path to .las or .laz file to load
+        chunk_size: maximum number of points read from the file at a time
+        bbox: (min_easting, min_northing, max_easting, max_northing) in UTM meters
+        rotated_window: only keep points inside this shore-normal rectangle
+        elevation_range: (min, max) elevation_m to keep
+        target_crs: reproject every chunk to this CRS after filtering
+        source_crs: CRS of the file, defaults to the one in its header
+        point_filter: only keep the returns it selects
+
+    Yields:
+        pd.DataFrame with easting, northing and elevation_m columns holding the
+        points of one chunk that pass the filters
+    """
+    with open_las(filename, laz_fields(point_filter)) as reader:
+        if not _header_overlaps(reader.header, bbox, elevation_range):
+            return
+        source_crs = _source_crs(reader.header, source_crs, target_crs)
+        for points in reader.chunk_iterator(chunk_size):
+            index = _chunk_selection(points, bbox, rotated_window, elevation_range, point_filter)
+            chunk = _points_to_frame(points, index)
+            if target_crs is not None:
+                chunk = reproject_frame(chunk, source_crs, target_crs)
+            yield chunk
+
+
+def import_lidar_las(
+    filename: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    process_chunk: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    rotated_window: Optional[RotatedWindow] = None,
+    elevation_range: Optional[Tuple[float, float]] = None,
+    target_crs=None,
+    source_crs=None,
+    point_filter: Optional[PointFilter] = None
+) -> pd.DataFrame:
+    """Load lidar (.las) point data in UTM coordinates.
+
+    This file should be in UTM coordinates and NAVD88 vertical coordinates, which should
+    be in meters. Data portal: NOAA Data Viewer website.
+
+    Without process_chunk or any filters the whole file is loaded, but it is read in
+    chunks into a single preallocated buffer so only one copy of the points is ever
+    held. bbox, rotated_window, elevation_range and point_filter drop points chunk
+    by chunk while the file is read, which replaces loading everything and masking
+    with pandas:
+
+        df = import_lidar_las(
+            filename,
+            rotated_window=RotatedWindow(3678000, 460500, 35, y_min=7100, y_max=7400),
+            elevation_range=(-15, 5),
+        )
+
+    With process_chunk, each chunk is reduced as soon as it is read (for example
+    transform_coordinates followed by build_transects) and only the reduced rows
+    are kept, so peak memory no longer depends on the size of the file.
+
+    Args:
+        filename: path to .las or .laz file to load
+        chunk_size: number of points read from the file at a time
+        process_chunk: optional function applied to every chunk before it is kept
+        bbox: (min_easting, min_northing, max_easting, max_northing) in UTM meters
+        rotated_window: only keep points inside this shore-normal rectangle
+        elevation_range: (min, max) elevation_m to keep
+        target_crs: reproject the points to this CRS; a geographic CRS such as
+            "EPSG:4326" adds longitude and latitude columns, a projected one
+            replaces easting and northing
+        source_crs: CRS of the file, defaults to the one in its header
+        point_filter: only keep the returns it selects, e.g.
+            PointFilter(classifications=BARE_EARTH_CLASSES)
+
+    Returns:
+        pd.DataFrame containing columns for:
+            easting: meters east of known origin
+            northing: meters north of known origin
+            elevation_m: height above or below ground
+        (plus longitude/latitude for a geographic target_crs) or the concatenated process_chunk output if process_chunk is given
+    """
+    filtered = (bbox is not None or rotated_window is not None or elevation_range is not None
+                or point_filter is not None)
+    if process_chunk is not None or filtered:
+        if process_chunk is None:
+            process_chunk = lambda chunk: chunk
+        chunks = [
+            process_chunk(chunk)
+            for chunk in iter_lidar_las(
+                filename, chunk_size, bbox, rotated_window, elevation_range,
+                target_crs, source_crs, point_filter,
+            )
+        ]
+        if not chunks:
+            empty = pd.DataFrame(columns=LIDAR_COLUMNS, dtype=np.float64)
+            if target_crs is not None:
+                # same columns as a reprojected chunk
+                empty = reproject_frame(empty, target_crs, target_crs)
+            chunks = [process_chunk(empty)]
+        return pd.concat(chunks, ignore_index=True)
+
+    with open_las(filename) as reader:
+        source_crs = _source_crs(reader.header, source_crs, target_crs)
+        coords = np.empty((3, reader.header.point_count), dtype=np.float64)
+        start = 0
+        for points in reader.chunk_iterator(chunk_size):
+            stop = start + len(points)
+            for axis in range(3):
+                _scaled(points, axis, out=coords[axis, start:stop])
+            start = stop
+
+    df = pd.DataFrame(coords[:, :start].T, columns=LIDAR_COLUMNS, copy=False)
+    if target_crs is not None:
+        df = reproject_frame(df, source_crs, target_crs)
+    return df
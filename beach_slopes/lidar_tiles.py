@@ -0,0 +1,234 @@
+"""
+Reading a survey that is split into LAS tiles as one point stream.
+
+NOAA delivers the larger surveys as tiles (e.g. the Lejeune
+Job836807_34077_55_29.las and Job836807_34077_57_25.las). build_tile_index
+reads only the header of every tile (point count and bounds). The readers then
+open just the tiles that can intersect the requested bbox, rotated window and
+elevation range. Those tiles are read concurrently, and their chunks come out
+as one stream, in tile order:
+
+    df = import_lidar_tiles(
+        '/data/lejeune/2014_NGS_postSandy_topobathy_Job836807',
+        rotated_window=RotatedWindow(3825700, 289000, 305, x_min=0, y_min=1000, y_max=2200),
+    )
+"""
+import glob
+import os
+import queue
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from .coordinates import rotate_coordinates
+from .lidar_io import (
+    DEFAULT_CHUNK_SIZE, LIDAR_COLUMNS, PointFilter, RotatedWindow, _header_overlaps,
+    iter_lidar_las, open_las,
+)
+from .reprojection import reproject_frame
+
+# chunks each tile may read ahead of the consumer
+_PREFETCH_CHUNKS = 2
+
+
+class LasTile(NamedTuple):
+    """Header summary of one LAS tile; mins/maxs are (easting, northing, elevation)."""
+    filename: str
+    point_count: int
+    mins: Tuple[float, float, float]
+    maxs: Tuple[float, float, float]
+
+
+def _tile_filenames(source: Union[str, Iterable[str]]) -> List[str]:
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            filenames = [
+                filename for pattern in ("*.las", "*.LAS", "*.laz", "*.LAZ")
+                for filename in glob.glob(os.path.join(source, pattern))
+            ]
+        else:
+            filenames = glob.glob(source)
+    else:
+        filenames = list(source)
+    return sorted(set(filenames))
+
+
+def build_tile_index(source: Union[str, Iterable[str]]) -> List[LasTile]:
+    """Read the header of every tile, without touching any points.
+
+    Args:
+        source: directory of .las/.laz files, glob pattern, or list of filenames
+
+    Returns:
+        list of LasTile, sorted by filename
+    """
+    tiles = []
+    for filename in _tile_filenames(source):
+        with open_las(filename) as reader:
+            header = reader.header
+            tiles.append(LasTile(
+                filename=filename,
+                point_count=header.point_count,
+                mins=tuple(float(value) for value in header.mins),
+                maxs=tuple(float(value) for value in header.maxs),
+            ))
+    return tiles
+
+
+def _window_overlaps(tile: LasTile, rotated_window: Optional[RotatedWindow]) -> bool:
+    """Compare the rotated tile rectangle's extent with the window (conservative)."""
+    if rotated_window is None:
+        return True
+    corner_easting = np.array([tile.mins[0], tile.maxs[0], tile.maxs[0], tile.mins[0]])
+    corner_northing = np.array([tile.mins[1], tile.mins[1], tile.maxs[1], tile.maxs[1]])
+    rotated_x, rotated_y = rotate_coordinates(
+        corner_easting, corner_northing,
+        rotated_window.new_origin_north, rotated_window.new_origin_east, rotated_window.theta_deg,
+    )
+    return (rotated_x.max() >= rotated_window.x_min and rotated_x.min() <= rotated_window.x_max
+            and rotated_y.max() >= rotated_window.y_min and rotated_y.min() <= rotated_window.y_max)
+
+
+def select_tiles(
+    tiles: List[LasTile],
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    rotated_window: Optional[RotatedWindow] = None,
+    elevation_range: Optional[Tuple[float, float]] = None
+) -> List[LasTile]:
+    """Tiles whose header bounds can hold points inside all of the filters."""
+    return [
+        tile for tile in tiles
+        if _header_overlaps(tile, bbox, elevation_range) and _window_overlaps(tile, rotated_window)
+    ]
+
+
+def _tiles(source) -> List[LasTile]:
+    source = list(source) if not isinstance(source, str) else source
+    if not isinstance(source, str) and source and isinstance(source[0], LasTile):
+        return source
+    return build_tile_index(source)
+
+
+def iter_lidar_tiles(
+    source: Union[str, Iterable[str], Iterable[LasTile]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    rotated_window: Optional[RotatedWindow] = None,
+    elevation_range: Optional[Tuple[float, float]] = None,
+    target_crs=None,
+    source_crs=None,
+    point_filter: Optional[PointFilter] = None,
+    workers: int = 4
+) -> Iterator[pd.DataFrame]:
+    """Stream the points of a tiled survey, chunk by chunk, like iter_lidar_las.
+
+    Up to workers tiles are read at the same time, each at most a couple of
+    chunks ahead of the consumer. The chunks are yielded tile by tile in
+    filename order, so the stream (and anything built from it) is the same on
+    every run.
+
+    Args:
+        source: directory of .las/.laz tiles, glob pattern, list of filenames, or a
+            tile index from build_tile_index
+        chunk_size: maximum number of points read from a tile at a time
+        bbox, rotated_window, elevation_range, target_crs, source_crs,
+            point_filter: see iter_lidar_las
+        workers: number of tiles read concurrently
+
+    Yields:
+        pd.DataFrame with easting, northing and elevation_m columns
+    """
+    tiles = select_tiles(_tiles(source), bbox, rotated_window, elevation_range)
+    if not tiles:
+        return
+
+    stop = threading.Event()
+    done = object()
+    buffers = [queue.Queue(maxsize=_PREFETCH_CHUNKS) for _ in tiles]
+
+    def put(buffer: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_tile(tile: LasTile, buffer: queue.Queue) -> None:
+        try:
+            chunks = iter_lidar_las(
+                tile.filename, chunk_size, bbox, rotated_window, elevation_range,
+                target_crs, source_crs, point_filter,
+            )
+            with closing(chunks):
+                for chunk in chunks:
+                    if not put(buffer, chunk):
+                        return
+            put(buffer, done)
+        except BaseException as error:
+            put(buffer, error)
+
+    # tiles are started in order, so the tile being consumed is always running
+    executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(tiles))))
+    try:
+        for tile, buffer in zip(tiles, buffers):
+            executor.submit(read_tile, tile, buffer)
+        for buffer in buffers:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def import_lidar_tiles(
+    source: Union[str, Iterable[str], Iterable[LasTile]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    process_chunk: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    rotated_window: Optional[RotatedWindow] = None,
+    elevation_range: Optional[Tuple[float, float]] = None,
+    target_crs=None,
+    source_crs=None,
+    point_filter: Optional[PointFilter] = None,
+    workers: int = 4
+) -> pd.DataFrame:
+    """Load a tiled survey into one frame, as import_lidar_las does for one file.
+
+    Args:
+        source: directory of .las/.laz tiles, glob pattern, list of filenames, or a
+            tile index from build_tile_index
+        chunk_size: number of points read from a tile at a time
+        process_chunk: optional function applied to every chunk before it is kept
+        bbox, rotated_window, elevation_range, target_crs, source_crs,
+            point_filter: see import_lidar_las
+        workers: number of tiles read concurrently
+
+    Returns:
+        pd.DataFrame with easting, northing and elevation_m columns, or the
+        concatenated process_chunk output if process_chunk is given
+    """
+    if process_chunk is None:
+        process_chunk = lambda chunk: chunk
+    chunks = [
+        process_chunk(chunk)
+        for chunk in iter_lidar_tiles(
+            source, chunk_size, bbox, rotated_window, elevation_range,
+            target_crs, source_crs, point_filter, workers,
+        )
+    ]
+    if not chunks:
+        empty = pd.DataFrame(columns=LIDAR_COLUMNS, dtype=np.float64)
+        if target_crs is not None:
+            empty = reproject_frame(empty, target_crs, target_crs)
+        chunks = [process_chunk(empty)]
+    return pd.concat(chunks, ignore_index=True)
@@ -0,0 +1,318 @@
+"""
+Figures of the transect pipeline.
+
+matplotlib is imported inside the plotting functions, so the package (and any
+script that only loads or processes data) does not pay for it at import time.
+
+Point maps of a survey are rasterized before they are drawn: plot_point_map
+bins the points into one pixel grid at the output resolution, aggregating the
+elevation of every pixel's points, and draws a single image. Drawing time then
+depends on the figure size, not on the millions of returns in the window:
+
+    section = df.take(index.window(x_min=-600, x_max=150, y_min=4000, y_max=8000))
+    plot_point_map(section, extent=(-600, 150, 4000, 8000), vmin=-4, vmax=4)
+"""
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .gridding import cell_runs
+
+# pixel aggregations of plot_point_map / rasterize_points
+RASTER_STATISTICS = ("mean", "min", "max", "count")
+
+
+def _pixel_column_points(points: np.ndarray, codes: np.ndarray, xlim: List[float], columns: int) -> np.ndarray:
+    """Indices of the points that still draw the same lines at one sample per pixel column.
+
+    Within a run of consecutive points of one line that fall in the same pixel
+    column, only the first, last, lowest and highest points show in the
+    rasterized line, so the others are dropped. Points left or right of xlim
+    count as one column on each side, and NaN points are kept as line breaks.
+    """
+    x_low, x_high = xlim
+    column = np.clip(np.floor((points[:, 0] - x_low) * (columns / (x_high - x_low))), -1, columns)
+    y = points[:, 1]
+    finite = np.isfinite(column) & np.isfinite(y)
+    run_starts = np.flatnonzero(np.r_[
+        True, (column[1:] != column[:-1]) | (codes[1:] != codes[:-1]) | ~finite[1:] | ~finite[:-1]
+    ])
+    run_lengths = np.diff(np.append(run_starts, len(y)))
+    keep = y == np.repeat(np.minimum.reduceat(y, run_starts), run_lengths)
+    keep |= y == np.repeat(np.maximum.reduceat(y, run_starts), run_lengths)
+    keep[run_starts] = True
+    keep[run_starts + run_lengths - 1] = True
+    return np.flatnonzero(keep)
+
+
+def draw_x_depth_transects(
+    ax,
+    df: pd.DataFrame,
+    title: str,
+    regression_slope: float,
+    regression_intercept: float,
+    xlim: List[float],
+    ylim: List[float],
+    dpi: float = 300
+) -> None:
+    """Draw cross-shore transects and their linear fit on ax (see plot_x_depth_transects).
+
+    All transects go into one LineCollection, split at the transect_id
+    boundaries of the (sorted) frame, and are colored with the axes color
+    cycle in transect order like one plot call per transect would be. Each
+    transect is first thinned to the points that show at dpi (a few per pixel
+    column of the axes), so drawing time depends on the figure size rather
+    than on the number of points.
+    """
+    import matplotlib
+    from matplotlib.collections import LineCollection
+
+    ax.figure.suptitle(title)
+    ax.set_title(f'Linear fit slope: {regression_slope:.02}')
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    ax.set_xlabel('Cross-shore Distance (m)')
+    ax.set_ylabel('Elevation (m)')
+
+    # transects numbered in order of appearance, which is sorted for build_transects output
+    codes, _ = pd.factorize(df.transect_id)
+    points = np.column_stack((df.rotated_x.to_numpy(dtype=np.float64), df.elevation_m.to_numpy(dtype=np.float64)))
+    if np.any(codes[1:] < codes[:-1]):
+        # keep the row order within each transect, as selecting it by mask would
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        points = points[order]
+    if len(points):
+        box = ax.get_window_extent()
+        columns = max(int(round(box.width * dpi / ax.figure.dpi)), 1)
+        keep = _pixel_column_points(points, codes, xlim, columns)
+        codes = codes[keep]
+        points = points[keep]
+    boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    segments = np.split(points, boundaries) if len(points) else []
+    cycle = matplotlib.rcParams['axes.prop_cycle'].by_key().get('color', ['C0'])
+    colors = [cycle[k % len(cycle)] for k in range(len(segments))]
+    ax.add_collection(LineCollection(
+        segments, colors=colors, linewidths=matplotlib.rcParams['lines.linewidth'],
+        capstyle=matplotlib.rcParams['lines.solid_capstyle'],
+        joinstyle=matplotlib.rcParams['lines.solid_joinstyle'],
+    ))
+
+    ax.axline(xy1 = (0, regression_intercept), xy2 = None, slope = regression_slope, color = 'black' )
+    ax.grid()
+
+
+def plot_x_depth_transects(
+    df: pd.DataFrame,
+    title: str,
+    regression_slope: float,
+    regression_intercept: float,
+    xlim: List[float],
+    ylim: List[float],
+    export_filename: str,
+) -> None:
+    """ Plot cross-shore transects along beach or surf-zone sections of data
+
+
+    Args:
+        df: needs rotated_x, and elevation_m columns
+        Title: Plot title
+        regression_slope:
+        regression_intercept: y intercept
+        xlim: the min and max numbers you want plotted on the x axis
+        ylim: the min and max numbers you want plotted on the y axis
+        export_filename: the filename and location
+
+    Returns:
+        Figure plot
+    """
+    import matplotlib.pyplot as plt
+
+    draw_x_depth_transects(plt.gca(), df, title, regression_slope, regression_intercept, xlim, ylim, dpi=300)
+    plt.savefig(export_filename, dpi = 300)
+    plt.close()
+
+
+def draw_profile_anatomy(
+    ax,
+    x: np.ndarray,
+    elevation: np.ndarray,
+    zone_fits: Optional[pd.DataFrame] = None,
+    title: str = "Anatomy of a Sandy Beach",
+    xlim: Tuple[float, float] = (-100, 1000),
+    ylim: Tuple[float, float] = (-12, 7),
+    tide_range: Tuple[float, float] = (-1, 1)
+) -> None:
+    """Draw one (smoothed) profile with the shoreline, tide levels and zone slopes.
+
+    Args:
+        ax: axes to draw on
+        x: cross-shore distance of the profile nodes
+        elevation: profile elevation at x (NaN gaps are left blank)
+        zone_fits: slope_table(..., by=None) rows (zone, slope, intercept) to
+            draw as lines, each labelled with its slope in the legend
+        title: figure title
+        xlim: cross-shore range shown
+        ylim: elevation range shown
+        tide_range: (low tide, high tide) elevations
+    """
+    ax.figure.suptitle(title)
+    ax.set_xlabel('Cross-shore Distance (m)')
+    ax.set_ylabel('Elevation (m)')
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    ax.plot(x, elevation, color='black')
+
+    low_tide, high_tide = tide_range
+    ax.axvline(0, color='grey', alpha=.85)
+    ax.axhline(0, color='grey', alpha=.85)
+    ax.axhline(high_tide, color='grey', alpha=.5, linestyle=':')
+    ax.axhline(low_tide, color='grey', alpha=.5, linestyle=':')
+    text_x = xlim[1] - 0.01 * (xlim[1] - xlim[0])
+    ax.text(text_x, high_tide, 'high tide', fontsize='small', alpha=.9, ha='right')
+    ax.text(text_x, low_tide, 'low tide', fontsize='small', alpha=.9, ha='right')
+    ax.text(text_x, .1, 'mean sea level', fontsize='small', alpha=.9, ha='right')
+    ax.text(2, ylim[1] - 3, 'shoreline', fontsize='small')
+
+    if zone_fits is not None and len(zone_fits):
+        for k, row in enumerate(zone_fits.itertuples()):
+            if np.isfinite(row.slope):
+                ax.axline((0, row.intercept), slope=row.slope, color=f'C{k}', alpha=.6,
+                          label=f'{abs(row.slope):.3f} {row.zone} slope')
+        ax.legend(fontsize='xx-small', loc='lower left')
+
+
+def rasterize_points(
+    x: np.ndarray,
+    y: np.ndarray,
+    values: np.ndarray,
+    extent: Tuple[float, float, float, float],
+    shape: Tuple[int, int],
+    statistic: str = "mean"
+) -> np.ndarray:
+    """Aggregate scattered point values into a regular pixel grid.
+
+    Pixels split extent evenly; points on the right/top edge fall in the last
+    pixel and points outside extent are ignored.
+
+    Args:
+        x: horizontal coordinate of every point
+        y: vertical coordinate of every point
+        values: value of every point (ignored for "count")
+        extent: (x_min, x_max, y_min, y_max) covered by the grid
+        shape: (rows, columns) of the grid
+        statistic: "mean", "min", "max" or "count" of the values in each pixel
+
+    Returns:
+        (rows, columns) float array, row 0 at y_min, NaN in pixels without
+        points (0 for "count")
+    """
+    if statistic not in RASTER_STATISTICS:
+        raise ValueError(f"unknown statistic {statistic!r}, expected one of {RASTER_STATISTICS}")
+    x_min, x_max, y_min, y_max = extent
+    rows, columns = shape
+    if rows <= 0 or columns <= 0 or x_max <= x_min or y_max <= y_min:
+        raise ValueError(f"need a non-empty extent and shape, got {extent} and {shape}")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    column = np.floor((x - x_min) * (columns / (x_max - x_min))).astype(np.int64)
+    row = np.floor((y - y_min) * (rows / (y_max - y_min))).astype(np.int64)
+    column[x == x_max] = columns - 1
+    row[y == y_max] = rows - 1
+    inside = (column >= 0) & (column < columns) & (row >= 0) & (row < rows)
+    pixels = row[inside] * columns + column[inside]
+
+    count = np.bincount(pixels, minlength=rows * columns)
+    if statistic == "count":
+        return count.reshape(rows, columns).astype(np.float64)
+    values = np.asarray(values, dtype=np.float64)[inside]
+    if statistic == "mean":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            grid = np.bincount(pixels, weights=values, minlength=rows * columns) / count
+    else:
+        # sorted by pixel, every pixel's points are one run for reduceat to fold
+        # (ufunc.at is several times slower on the numpy we pin)
+        reduce = np.minimum if statistic == "min" else np.maximum
+        order, sorted_pixels, run_starts = cell_runs(pixels, rows * columns)
+        grid = np.full(rows * columns, np.nan)
+        if len(run_starts):
+            grid[sorted_pixels[run_starts]] = reduce.reduceat(values[order], run_starts)
+    return grid.reshape(rows, columns)
+
+
+def plot_point_map(
+    df: pd.DataFrame,
+    extent: Optional[Tuple[float, float, float, float]] = None,
+    statistic: str = "mean",
+    x: str = "rotated_x",
+    y: str = "rotated_y",
+    c: str = "elevation_m",
+    cmap="RdBu_r",
+    vmin: Optional[float] = None,
+    vmax: Optional[float] = None,
+    shape: Optional[Tuple[int, int]] = None,
+    dpi: float = 300,
+    ax=None,
+    colorbar_ax=None
+):
+    """Map of point values drawn as one aggregated image instead of a scatter.
+
+    Replaces df.plot.scatter(x='rotated_x', y='rotated_y', c='elevation_m', ...)
+    for large point clouds. By default the grid has one pixel per device pixel
+    of the axes when saved at dpi, so the result looks like the scatter it
+    replaces, with the elevation of overlapping points aggregated by statistic.
+
+    Args:
+        df: points to draw
+        extent: (x_min, x_max, y_min, y_max) to draw, default the data bounds
+        statistic: "mean", "min", "max" or "count" of each pixel's points
+        x: column for the horizontal axis
+        y: column for the vertical axis
+        c: column to aggregate and color by
+        cmap: colormap (name or Colormap), default reversed RdBu
+        vmin: value at the bottom of the colormap
+        vmax: value at the top of the colormap
+        shape: (rows, columns) of the pixel grid, default from the axes size at
+            dpi once the colorbar has its space (a layout engine such as
+            "constrained" resizes the axes only when drawing; pass shape then)
+        dpi: resolution the figure will be saved at
+        ax: axes to draw on, default the current axes
+        colorbar_ax: axes to draw the colorbar into, default space taken from ax
+
+    Returns:
+        the matplotlib AxesImage (a colorbar labelled c is added for it)
+    """
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        ax = plt.gca()
+    x_values = df[x].to_numpy()
+    y_values = df[y].to_numpy()
+    if extent is None:
+        extent = (x_values.min(), x_values.max(), y_values.min(), y_values.max())
+    colorbar_kwargs = {}
+    if colorbar_ax is None:
+        # take the colorbar's space from ax (as figure.colorbar(ax=ax) would)
+        # before measuring ax for the pixel grid
+        from matplotlib import colorbar
+
+        engine = ax.figure.get_layout_engine()
+        subplotspec = getattr(ax, "get_subplotspec", lambda: None)()
+        if subplotspec is not None and (engine is None or engine.colorbar_gridspec):
+            colorbar_ax, colorbar_kwargs = colorbar.make_axes_gridspec(ax)
+        else:
+            colorbar_ax, colorbar_kwargs = colorbar.make_axes(ax)
+    if shape is None:
+        box = ax.get_window_extent()
+        scale = dpi / ax.figure.dpi
+        shape = (max(int(round(box.height * scale)), 1), max(int(round(box.width * scale)), 1))
+
+    grid = rasterize_points(x_values, y_values, df[c].to_numpy(), extent, shape, statistic)
+    image = ax.imshow(
+        grid, extent=extent, origin="lower", aspect="auto", interpolation="nearest",
+        cmap=cmap, vmin=vmin, vmax=vmax,
+    )
+    ax.figure.colorbar(image, cax=colorbar_ax, label=c, **colorbar_kwargs)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    return image
@@ -0,0 +1,202 @@
+"""
+Memory-mapped columnar point store.
+
+build_point_store reads a LAS file once and writes each field (easting,
+northing, elevation_m) to its own contiguous binary file next to a small
+meta.json. PointStore opens those files read-only with np.memmap, so the
+points are paged in by the OS on demand and several worker processes reading
+the same survey share one copy through the page cache instead of each holding
+its own DataFrame.
+
+The rotation and transect stages work directly on the mapped arrays: rotate()
+streams the coordinates through rotate_coordinates into two new mapped columns,
+and transects() only gathers the rows that land in a transect into memory.
+"""
+import json
+import os
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from .coordinates import rotate_coordinates
+from .lidar_io import DEFAULT_CHUNK_SIZE, LIDAR_COLUMNS, iter_lidar_las
+from .transects import sorted_transect_rows
+
+_META = "meta.json"
+
+
+def _column_path(path: str, column: str) -> str:
+    return os.path.join(path, f"{column}.bin")
+
+
+def _write_meta(path: str, meta: dict) -> None:
+    """Replace a store's meta.json atomically, so readers see the old or the new one."""
+    tmp_path = os.path.join(path, _META + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp_path, os.path.join(path, _META))
+
+
+class PointStore:
+    """Read-only, memory-mapped view of a point store directory.
+
+    store["elevation_m"] returns the mapped column as an np.memmap; slicing or
+    masking it only reads the pages that are touched.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, _META)) as f:
+            self.meta = json.load(f)
+        self._columns: Dict[str, np.memmap] = {}
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def columns(self):
+        return list(self.meta["columns"])
+
+    def __getitem__(self, column: str) -> np.memmap:
+        if column not in self._columns:
+            dtype = np.dtype(self.meta["columns"][column])
+            if len(self) == 0:
+                # np.memmap can't map an empty file
+                return np.empty(0, dtype=dtype)
+            self._columns[column] = np.memmap(
+                _column_path(self.path, column), dtype=dtype, mode="r", shape=(len(self),)
+            )
+        return self._columns[column]
+
+    def _write_meta(self) -> None:
+        _write_meta(self.path, self.meta)
+
+    def rotate(
+        self,
+        new_origin_north: float,
+        new_origin_east: float,
+        theta_deg: float,
+        dtype=np.float32
+    ) -> None:
+        """Add (or overwrite) mapped rotated_x and rotated_y columns.
+
+        Same transformation as transform_coordinates; the output is written
+        straight into the new mapped files, block by block.
+
+        Args:
+            new_origin_north: location (in UTM) ideally along the shoreline
+            new_origin_east: location (in UTM) ideally along the shoreline
+            theta_deg: the angle that the shoreline sits at - degrees from true north
+            dtype: dtype of the rotated columns, float32 by default
+        """
+        outputs = []
+        for column in ("rotated_x", "rotated_y"):
+            self._columns.pop(column, None)
+            if len(self) == 0:
+                open(_column_path(self.path, column), "wb").close()
+                outputs.append(None)
+                continue
+            outputs.append(np.memmap(
+                _column_path(self.path, column), dtype=dtype, mode="w+", shape=(len(self),)
+            ))
+
+        if len(self):
+            rotate_coordinates(
+                self["easting"], self["northing"],
+                new_origin_north, new_origin_east, theta_deg,
+                out_x=outputs[0], out_y=outputs[1],
+            )
+            for output in outputs:
+                output.flush()
+
+        for column in ("rotated_x", "rotated_y"):
+            self.meta["columns"][column] = np.dtype(dtype).str
+        self.meta["rotation"] = {
+            "new_origin_north": new_origin_north,
+            "new_origin_east": new_origin_east,
+            "theta_deg": theta_deg,
+        }
+        self._write_meta()
+
+    def frame(
+        self,
+        columns: Optional[Iterable[str]] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> pd.DataFrame:
+        """Copy some columns (and optionally some rows) into an in-memory DataFrame."""
+        if columns is None:
+            columns = self.columns
+        if rows is None:
+            return pd.DataFrame({column: np.asarray(self[column]) for column in columns})
+        return pd.DataFrame({column: self[column][rows] for column in columns})
+
+    def transects(
+        self,
+        y_min: float,
+        y_max: float,
+        y_transect_width: float,
+        y_transect_gap: float,
+        columns: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """build_transects on the mapped columns; requires rotate() first.
+
+        Only rotated_y is scanned in full. The remaining columns are read for
+        the transect rows alone.
+
+        Returns:
+            pd.DataFrame with the requested columns (all by default) plus
+            transect_id, sorted by transect_id then rotated_x
+        """
+        if "rotated_y" not in self.meta["columns"]:
+            raise ValueError("call PointStore.rotate before building transects")
+        rows, transect_ids = sorted_transect_rows(
+            self["rotated_x"], self["rotated_y"],
+            y_min, y_max, y_transect_width, y_transect_gap,
+        )
+        transects_df = self.frame(columns, rows)
+        transects_df["transect_id"] = transect_ids
+        return transects_df
+
+
+def build_point_store(
+    las_filename: str,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **filters
+) -> PointStore:
+    """Write a LAS file's points to a point store directory.
+
+    Args:
+        las_filename: path to .las or .laz file to load
+        path: directory to create the store in
+        chunk_size: number of points read from the file at a time
+        **filters: bbox, rotated_window and/or elevation_range, as for iter_lidar_las
+
+    Returns:
+        PointStore opened on the new directory
+    """
+    os.makedirs(path, exist_ok=True)
+    # rebuilding truncates the column files, so drop the old meta.json first:
+    # if the read fails partway there is no store to open rather than one
+    # whose count no longer matches its columns
+    meta_path = os.path.join(path, _META)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    files = {column: open(_column_path(path, column), "wb") for column in LIDAR_COLUMNS}
+    count = 0
+    try:
+        for chunk in iter_lidar_las(las_filename, chunk_size, **filters):
+            for column, f in files.items():
+                chunk[column].to_numpy().tofile(f)
+            count += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    meta = {
+        "count": count,
+        "columns": {column: np.dtype(np.float64).str for column in LIDAR_COLUMNS},
+        "source": os.path.abspath(las_filename),
+    }
+    _write_meta(path, meta)
+    return PointStore(path)
@@ -0,0 +1,238 @@
+"""
+Transect profiles on a common cross-shore grid.
+
+build_transects returns every transect as an irregular scatter of rotated_x,
+which makes smoothing, averaging and comparing transects awkward (the plots
+used rolling means over row order, i.e. over a varying distance).
+grid_profiles bins or interpolates all transects onto one fixed rotated_x
+grid in a single pass and returns a dense (transects x grid) array. Smoothing
+with a window in meters, averaging profiles and per-transect slopes are then
+plain array operations:
+
+    profiles = grid_profiles(df, spacing=0.5, x_min=-100, x_max=1000)
+    smoothed = smooth_profiles(profiles, window=5.0)
+    plt.plot(smoothed.x, smoothed.elevation[smoothed.row(2)])
+"""
+from typing import NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+from .slopes import grouped_median
+
+
+class ProfileGrid(NamedTuple):
+    """Dense transect profiles; elevation is NaN where a transect has no data."""
+    transect_ids: np.ndarray
+    x: np.ndarray
+    elevation: np.ndarray
+    count: np.ndarray
+
+    def row(self, transect_id) -> int:
+        """Row of elevation/count holding the given transect."""
+        row = np.searchsorted(self.transect_ids, transect_id)
+        if row >= len(self.transect_ids) or self.transect_ids[row] != transect_id:
+            raise KeyError(f"transect {transect_id} is not in the grid")
+        return int(row)
+
+    def mean_profile(self) -> np.ndarray:
+        """Average profile over all transects, ignoring their gaps."""
+        filled = np.isfinite(self.elevation)
+        with np.errstate(invalid="ignore"):
+            return np.where(filled, self.elevation, 0).sum(axis=0) / filled.sum(axis=0)
+
+    def frame(self) -> pd.DataFrame:
+        """Long transect_id/rotated_x/elevation_m frame of the filled grid nodes,
+        in the layout slope_table and zone_masks expect."""
+        rows, columns = np.nonzero(np.isfinite(self.elevation))
+        return pd.DataFrame({
+            "transect_id": self.transect_ids[rows],
+            "rotated_x": self.x[columns],
+            "elevation_m": self.elevation[rows, columns],
+        })
+
+
+def grid_profiles(
+    df: pd.DataFrame,
+    spacing: float = 0.5,
+    x_min: Optional[float] = None,
+    x_max: Optional[float] = None,
+    method: str = "mean",
+    max_gap: Optional[float] = None,
+    by: str = "transect_id",
+    x: str = "rotated_x",
+    y: str = "elevation_m"
+) -> ProfileGrid:
+    """Resample every transect onto grid nodes x_min, x_min + spacing, ..., <= x_max.
+
+    "mean" and "median" bin the points within spacing/2 of each node. "linear"
+    interpolates between the neighbouring points of each transect instead, so
+    sparse transects still fill every node inside their data range; with
+    max_gap, nodes between two points further apart than max_gap stay NaN
+    rather than bridging a data gap.
+
+    Args:
+        df: transect frame from build_transects
+        spacing: grid spacing in meters
+        x_min: first grid node, default the smallest x rounded down to spacing
+        x_max: last grid node limit, default just past the largest x
+        method: "mean", "median" or "linear"
+        max_gap: largest distance between points that "linear" interpolates across
+        by: column identifying the transects
+        x: column to use as the cross-shore coordinate
+        y: column to resample
+
+    Returns:
+        ProfileGrid with transect_ids (sorted), grid x, elevation and count
+        (points per node bin) arrays
+    """
+    if spacing <= 0:
+        raise ValueError(f"spacing must be positive, got {spacing}")
+    if method not in ("mean", "median", "linear"):
+        raise ValueError(f"unknown method {method!r}, expected mean, median or linear")
+    codes, transect_ids = pd.factorize(df[by], sort=True)
+    x_values = df[x].to_numpy(dtype=np.float64)
+    y_values = df[y].to_numpy(dtype=np.float64)
+    if x_min is None:
+        x_min = np.floor(np.min(x_values) / spacing) * spacing if len(x_values) else 0.0
+    if x_max is None:
+        # far enough for the largest x to fall in the last node's bin
+        x_max = np.max(x_values) + spacing / 2 if len(x_values) else x_min
+    grid_x = x_min + spacing * np.arange(int(np.floor((x_max - x_min) / spacing + 1e-9)) + 1)
+    n_transects, n_nodes = len(transect_ids), len(grid_x)
+
+    # bin of every point, one flat index per (transect, node)
+    node = np.floor((x_values - x_min) / spacing + 0.5).astype(np.int64)
+    in_grid = (node >= 0) & (node < n_nodes)
+    cells = codes[in_grid] * n_nodes + node[in_grid]
+    count = np.bincount(cells, minlength=n_transects * n_nodes)
+
+    if method == "mean":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            elevation = np.bincount(cells, weights=y_values[in_grid], minlength=n_transects * n_nodes) / count
+    elif method == "median":
+        elevation = grouped_median(y_values[in_grid], cells, n_transects * n_nodes)
+    else:
+        elevation = _interpolate(codes, x_values, y_values, grid_x, n_transects, max_gap)
+
+    return ProfileGrid(
+        transect_ids=np.asarray(transect_ids),
+        x=grid_x,
+        elevation=elevation.reshape(n_transects, n_nodes),
+        count=count.reshape(n_transects, n_nodes),
+    )
+
+
+def _interpolate(
+    codes: np.ndarray,
+    x_values: np.ndarray,
+    y_values: np.ndarray,
+    grid_x: np.ndarray,
+    n_transects: int,
+    max_gap: Optional[float]
+) -> np.ndarray:
+    """Linear interpolation of every transect at every node, flattened row-major.
+
+    Points and nodes get a combined key transect * stride + x, so one sorted
+    array and one searchsorted cover all transects at once.
+    """
+    n_nodes = len(grid_x)
+    elevation = np.full(n_transects * n_nodes, np.nan)
+    if len(x_values) == 0:
+        return elevation
+    low = min(x_values.min(), grid_x[0])
+    stride = max(x_values.max(), grid_x[-1]) - low + 1.0
+    order = np.lexsort((x_values, codes))
+    point_codes = codes[order]
+    point_x = x_values[order]
+    point_y = y_values[order]
+    point_key = point_codes * stride + (point_x - low)
+    node_codes = np.repeat(np.arange(n_transects), n_nodes)
+    node_x = np.tile(grid_x, n_transects)
+    node_key = node_codes * stride + (node_x - low)
+
+    right = np.searchsorted(point_key, node_key, side="left")
+    left = right - 1
+    # an exact hit on a point takes that point's value
+    right_clipped = np.minimum(right, len(point_key) - 1)
+    exact = (right < len(point_key)) & (point_codes[right_clipped] == node_codes) & (point_x[right_clipped] == node_x)
+    inside = ((left >= 0) & (right < len(point_key))
+              & (point_codes[np.maximum(left, 0)] == node_codes)
+              & (point_codes[right_clipped] == node_codes))
+    if max_gap is not None:
+        inside &= point_x[right_clipped] - point_x[np.maximum(left, 0)] <= max_gap
+
+    left = left[inside]
+    right = right[inside]
+    x0, x1 = point_x[left], point_x[right]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = np.where(x1 > x0, (node_x[inside] - x0) / (x1 - x0), 0.0)
+    elevation[inside] = point_y[left] + fraction * (point_y[right] - point_y[left])
+    # a node exactly on a transect's first point has no left neighbour
+    elevation[exact] = point_y[right_clipped[exact]]
+    return elevation
+
+
+def smooth_profiles(profiles: ProfileGrid, window: float) -> ProfileGrid:
+    """Moving average over window meters of cross-shore distance.
+
+    Gaps are ignored inside the window (the average is over the filled nodes)
+    and stay NaN in the result.
+
+    Args:
+        profiles: output of grid_profiles
+        window: width of the averaging window in meters
+
+    Returns:
+        ProfileGrid with the smoothed elevation
+    """
+    spacing = profiles.x[1] - profiles.x[0] if len(profiles.x) > 1 else 1.0
+    half = max(int(round(window / spacing / 2)), 0)
+    filled = np.isfinite(profiles.elevation)
+    values = np.where(filled, profiles.elevation, 0.0)
+
+    # windowed sums from cumulative sums along the grid
+    n_nodes = values.shape[1]
+    padded_sum = np.zeros((values.shape[0], n_nodes + 1))
+    padded_count = np.zeros((values.shape[0], n_nodes + 1))
+    np.cumsum(values, axis=1, out=padded_sum[:, 1:])
+    np.cumsum(filled, axis=1, out=padded_count[:, 1:])
+    stop = np.minimum(np.arange(n_nodes) + half + 1, n_nodes)
+    start = np.maximum(np.arange(n_nodes) - half, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        smoothed = (padded_sum[:, stop] - padded_sum[:, start]) / (padded_count[:, stop] - padded_count[:, start])
+    smoothed[~filled] = np.nan
+    return profiles._replace(elevation=smoothed)
+
+
+def profile_slopes(
+    profiles: ProfileGrid,
+    x_min: float = -np.inf,
+    x_max: float = np.inf
+) -> pd.DataFrame:
+    """Least-squares slope of every profile over the grid nodes in [x_min, x_max].
+
+    Returns:
+        pd.DataFrame with transect_id, slope, intercept and n (filled nodes)
+    """
+    columns = (profiles.x >= x_min) & (profiles.x <= x_max)
+    grid_x = profiles.x[columns]
+    elevation = profiles.elevation[:, columns]
+    filled = np.isfinite(elevation)
+    n = filled.sum(axis=1)
+    x = np.where(filled, grid_x, 0.0)
+    y = np.where(filled, elevation, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = x.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dx = np.where(filled, grid_x - x_mean[:, None], 0.0)
+        dy = np.where(filled, elevation - y_mean[:, None], 0.0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+        intercept = y_mean - slope * x_mean
+    slope[n < 2] = np.nan
+    intercept[n < 2] = np.nan
+    return pd.DataFrame({
+        "transect_id": profiles.transect_ids,
+        "slope": slope,
+        "intercept": intercept,
+        "n": n,
+    })
@@ -0,0 +1,117 @@
+"""
+Bulk coordinate reprojection with cached pyproj transformers.
+
+osr.CoordinateTransformation.TransformPoint converts one coordinate per call,
+which is fine for a raster corner but hopeless for millions of lidar points.
+reproject converts whole arrays, a chunk at a time and in place in the output
+buffers, and reuses one Transformer per (source, target) pair for the life of
+the process.
+
+    df = import_lidar_las(filename, target_crs="EPSG:4326")   # adds longitude/latitude
+    df = reproject_frame(df, "EPSG:32611", "EPSG:32618")      # easting/northing into 18N
+
+pyproj is imported on first use.
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# points converted per transform call
+DEFAULT_REPROJECT_CHUNK = 1_000_000
+
+
+@lru_cache(maxsize=32)
+def _cached_transformer(source, target):
+    from pyproj import Transformer
+    return Transformer.from_crs(source, target, always_xy=True)
+
+
+def get_transformer(source_crs, target_crs):
+    """Transformer between two CRSs, built once and reused.
+
+    Args:
+        source_crs: anything pyproj.CRS accepts ("EPSG:32611", WKT, a CRS, ...)
+        target_crs: same, for the output coordinates
+
+    Returns:
+        pyproj Transformer taking (x, y) = (easting/longitude, northing/latitude)
+    """
+    from pyproj import CRS
+    return _cached_transformer(CRS.from_user_input(source_crs), CRS.from_user_input(target_crs))
+
+
+def reproject(
+    x: np.ndarray,
+    y: np.ndarray,
+    source_crs,
+    target_crs,
+    chunk_size: int = DEFAULT_REPROJECT_CHUNK,
+    out_x: Optional[np.ndarray] = None,
+    out_y: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Reproject coordinate arrays, chunk_size points per transform call.
+
+    Args:
+        x: easting (or longitude) of every point
+        y: northing (or latitude) of every point
+        source_crs: CRS of x and y
+        target_crs: CRS to convert to
+        chunk_size: number of points transformed at a time
+        out_x: optional preallocated float64 array for the converted x
+        out_y: optional preallocated float64 array for the converted y
+
+    Returns:
+        converted x, y arrays (out_x and out_y themselves when supplied)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) != len(y):
+        raise ValueError("x and y must be the same length")
+    if out_x is None:
+        out_x = np.empty(len(x))
+    if out_y is None:
+        out_y = np.empty(len(y))
+    transformer = get_transformer(source_crs, target_crs)
+    for start in range(0, len(x), chunk_size):
+        stop = min(start + chunk_size, len(x))
+        chunk_x = out_x[start:stop]
+        chunk_y = out_y[start:stop]
+        chunk_x[:] = x[start:stop]
+        chunk_y[:] = y[start:stop]
+        transformer.transform(chunk_x, chunk_y, inplace=True)
+    return out_x, out_y
+
+
+def reproject_frame(
+    df: pd.DataFrame,
+    source_crs,
+    target_crs,
+    chunk_size: int = DEFAULT_REPROJECT_CHUNK
+) -> pd.DataFrame:
+    """Reproject the easting/northing columns of a frame.
+
+    A geographic target adds longitude and latitude columns and leaves easting
+    and northing alone. A projected target overwrites easting and northing,
+    e.g. to line up surveys delivered in different UTM zones.
+
+    Args:
+        df: dataframe with easting and northing columns
+        source_crs: CRS of easting/northing
+        target_crs: CRS to convert to
+        chunk_size: number of points transformed at a time
+
+    Returns:
+        df, with the new or updated columns
+    """
+    from pyproj import CRS
+    x, y = reproject(
+        df.easting.to_numpy(), df.northing.to_numpy(), source_crs, target_crs, chunk_size
+    )
+    if CRS.from_user_input(target_crs).is_geographic:
+        df["longitude"] = x
+        df["latitude"] = y
+    else:
+        df["easting"] = x
+        df["northing"] = y
+    return df
@@ -0,0 +1,263 @@
+"""
+Estimate the shoreline origin and angle for transform_coordinates.
+
+Instead of guessing theta_deg and re-plotting the rotated cloud until the
+shoreline looks vertical, take the points near zero elevation (the same
++-0.2 m band used to eyeball the shoreline), fit a robust line through a
+decimated sample of them and read the origin and angle off the fit.
+
+    df = import_lidar_las(filename, elevation_range=(-0.2, 0.2))
+    fit = estimate_shoreline(df)
+    df = transform_coordinates(import_lidar_las(filename), *fit[:3])
+
+estimate_shoreline_segments does the same along consecutive stretches of a
+curved coast, giving one local origin and angle per segment.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+class ShorelineFit(NamedTuple):
+    """Origin and angle in the argument order of transform_coordinates."""
+    new_origin_north: float
+    new_origin_east: float
+    theta_deg: float
+    length: float
+    n_points: int
+
+
+def _shoreline_band(
+    df: pd.DataFrame,
+    band: float,
+    sample_size: Optional[int],
+    seed: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Easting, northing and elevation of a random sample of the near-zero points."""
+    elevation = df.elevation_m.to_numpy()
+    rows = np.flatnonzero((elevation >= -band) & (elevation <= band))
+    if sample_size is not None and len(rows) > sample_size:
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(rows, sample_size, replace=False))
+    return df.easting.to_numpy()[rows], df.northing.to_numpy()[rows], elevation[rows]
+
+
+def _robust_direction(
+    easting: np.ndarray,
+    northing: np.ndarray,
+    iterations: int = 3,
+    cutoff: float = 3.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Principal direction of the points, refit after trimming outliers.
+
+    Each pass drops the points further from the line than cutoff times the
+    (MAD-based) spread of the perpendicular residuals, so stray returns from
+    piers, wet sand patches or ponds don't tilt the fit.
+
+    Returns:
+        centroid (E, N), unit direction (E, N) and the boolean mask of kept points
+    """
+    keep = np.ones(len(easting), dtype=bool)
+    for _ in range(iterations):
+        points = np.column_stack((easting[keep], northing[keep]))
+        centroid = points.mean(axis=0)
+        _, _, axes = np.linalg.svd(points - centroid, full_matrices=False)
+        direction = axes[0]
+
+        offsets = np.column_stack((easting - centroid[0], northing - centroid[1]))
+        residual = offsets @ np.array([-direction[1], direction[0]])
+        spread = 1.4826 * np.median(np.abs(residual[keep] - np.median(residual[keep])))
+        if spread == 0:
+            break
+        new_keep = np.abs(residual) <= cutoff * spread
+        if new_keep.sum() < 2 or np.array_equal(new_keep, keep):
+            break
+        keep = new_keep
+    return centroid, direction, keep
+
+
+def _orient(
+    easting: np.ndarray,
+    northing: np.ndarray,
+    elevation: np.ndarray,
+    centroid: np.ndarray,
+    direction: np.ndarray,
+    offshore_positive: bool
+) -> np.ndarray:
+    """Flip the line direction so that rotated_x points offshore (or landward).
+
+    transform_coordinates puts the alongshore axis along (-sin theta, cos theta)
+    and the cross-shore axis along (cos theta, sin theta), i.e. rotated_x runs
+    along (direction_N, -direction_E). Within the shoreline band the elevation
+    still trends across the shore, which tells us which side is offshore.
+    """
+    cross = np.array([direction[1], -direction[0]])
+    cross_shore = np.column_stack((easting - centroid[0], northing - centroid[1])) @ cross
+    if len(cross_shore) > 2 and np.ptp(cross_shore) > 0:
+        elevation_trend = np.polyfit(cross_shore, elevation, 1)[0]
+        if (elevation_trend < 0) != offshore_positive:
+            return -direction
+    return direction
+
+
+def _fit_from_direction(
+    easting: np.ndarray,
+    northing: np.ndarray,
+    centroid: np.ndarray,
+    direction: np.ndarray
+) -> ShorelineFit:
+    """Origin and angle of an oriented line, with the origin at the start of
+    the shoreline points so that alongshore distances are positive."""
+    alongshore = np.column_stack((easting - centroid[0], northing - centroid[1])) @ direction
+    origin = centroid + direction * alongshore.min()
+    theta_deg = np.degrees(np.arctan2(-direction[0], direction[1])) % 360
+    return ShorelineFit(
+        new_origin_north=float(origin[1]),
+        new_origin_east=float(origin[0]),
+        theta_deg=float(theta_deg),
+        length=float(np.ptp(alongshore)),
+        n_points=len(easting),
+    )
+
+
+def estimate_shoreline(
+    df: pd.DataFrame,
+    band: float = 0.2,
+    sample_size: Optional[int] = 200_000,
+    offshore_positive: bool = True,
+    seed: int = 0
+) -> ShorelineFit:
+    """Fit the shoreline direction and origin from the points near zero elevation.
+
+    Args:
+        df: import_lidar_las output with easting, northing and elevation_m
+        band: points with |elevation_m| <= band are treated as shoreline
+        sample_size: decimate the shoreline points to at most this many, None uses all
+        offshore_positive: orient rotated_x to increase offshore (east coast
+            convention); False makes it increase landward as in main_refactor
+        seed: random seed for the decimation
+
+    Returns:
+        ShorelineFit; its first three fields can be passed straight to
+        transform_coordinates
+    """
+    easting, northing, elevation = _shoreline_band(df, band, sample_size, seed)
+    if len(easting) < 2:
+        raise ValueError(f"need at least two points within +-{band} m to fit a shoreline")
+
+    centroid, direction, keep = _robust_direction(easting, northing)
+    easting, northing, elevation = easting[keep], northing[keep], elevation[keep]
+    direction = _orient(easting, northing, elevation, centroid, direction, offshore_positive)
+    return _fit_from_direction(easting, northing, centroid, direction)
+
+
+def estimate_shoreline_segments(
+    df: pd.DataFrame,
+    segment_length: float = 1000.0,
+    band: float = 0.2,
+    sample_size: Optional[int] = 200_000,
+    offshore_positive: bool = True,
+    min_points: int = 50,
+    seed: int = 0
+) -> List[ShorelineFit]:
+    """Piecewise shoreline fit for curved coasts.
+
+    The shoreline points are split into consecutive segments of segment_length
+    along the overall shoreline direction and each segment gets its own robust
+    fit. Segments with fewer than min_points shoreline points are skipped.
+
+    Args:
+        df: import_lidar_las output with easting, northing and elevation_m
+        segment_length: alongshore length (meters) of each segment
+        band, sample_size, offshore_positive, seed: see estimate_shoreline
+        min_points: minimum shoreline points needed to fit a segment
+
+    Returns:
+        list of ShorelineFit, ordered alongshore
+    """
+    easting, northing, elevation = _shoreline_band(df, band, sample_size, seed)
+    if len(easting) < 2:
+        raise ValueError(f"need at least two points within +-{band} m to fit a shoreline")
+
+    centroid, direction, keep = _robust_direction(easting, northing)
+    direction = _orient(
+        easting[keep], northing[keep], elevation[keep], centroid, direction, offshore_positive
+    )
+    alongshore = np.column_stack((easting - centroid[0], northing - centroid[1])) @ direction
+    segment = ((alongshore - alongshore.min()) // segment_length).astype(np.int64)
+
+    # group the points by segment with one sort instead of a mask per segment
+    order = np.argsort(segment, kind="stable")
+    bounds = np.flatnonzero(np.diff(segment[order])) + 1
+    fits = []
+    for rows in np.split(order, bounds):
+        if len(rows) < min_points:
+            continue
+        seg_centroid, seg_direction, keep = _robust_direction(easting[rows], northing[rows])
+        # keep every segment oriented like the overall shoreline
+        if seg_direction @ direction < 0:
+            seg_direction = -seg_direction
+        rows = rows[keep]
+        fits.append(_fit_from_direction(easting[rows], northing[rows], seg_centroid, seg_direction))
+    return fits
+
+
+def shoreline_polyline(
+    df: pd.DataFrame,
+    station_spacing: float = 50.0,
+    smoothing_window: int = 5,
+    band: float = 0.2,
+    sample_size: Optional[int] = 200_000,
+    offshore_positive: bool = True,
+    min_points: int = 10,
+    seed: int = 0
+) -> np.ndarray:
+    """Smoothed shoreline polyline through the points near zero elevation.
+
+    The shoreline points are binned every station_spacing meters along the
+    overall shoreline direction. Each bin becomes one vertex at the median
+    cross-shore offset of its points, and the offsets are smoothed with a
+    centered moving average over smoothing_window vertices. This follows gentle
+    curvature but not a coast that doubles back on itself.
+
+    The vertices run in the alongshore (+rotated_y) direction of the overall
+    fit, so normals taken along the polyline point the same way as rotated_x.
+
+    Args:
+        df: import_lidar_las output with easting, northing and elevation_m
+        station_spacing: alongshore distance (meters) between vertices
+        smoothing_window: number of vertices in the moving average, 1 disables it
+        band, sample_size, offshore_positive, seed: see estimate_shoreline
+        min_points: bins with fewer shoreline points are dropped
+
+    Returns:
+        (n_vertices, 2) array of easting, northing
+    """
+    easting, northing, elevation = _shoreline_band(df, band, sample_size, seed)
+    if len(easting) < 2:
+        raise ValueError(f"need at least two points within +-{band} m to fit a shoreline")
+
+    centroid, direction, keep = _robust_direction(easting, northing)
+    direction = _orient(
+        easting[keep], northing[keep], elevation[keep], centroid, direction, offshore_positive
+    )
+    cross = np.array([direction[1], -direction[0]])
+    offsets = np.column_stack((easting - centroid[0], northing - centroid[1]))
+    stations = pd.DataFrame({
+        "station": (offsets @ direction) // station_spacing,
+        "alongshore": offsets @ direction,
+        "cross_shore": offsets @ cross,
+    }).groupby("station").agg(
+        alongshore=("alongshore", "median"),
+        cross_shore=("cross_shore", "median"),
+        n=("cross_shore", "size"),
+    )
+    stations = stations.loc[stations.n >= min_points]
+    cross_shore = stations.cross_shore.rolling(smoothing_window, center=True, min_periods=1).mean()
+
+    vertices = (
+        centroid
+        + np.outer(stations.alongshore.to_numpy(), direction)
+        + np.outer(cross_shore.to_numpy(), cross)
+    )
+    return vertices
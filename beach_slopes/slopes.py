@@ -0,0 +1,380 @@
+"""
+Batched least-squares slope fits for transect data.
+
+scipy.stats.linregress fits one set of points per call, so getting a slope for
+every transect in every zone means hundreds of calls. grouped_linregress fits
+every group at once from per-group sums (np.bincount), and slope_table wraps it
+to produce one tidy row per (transect_id, zone) pair.
+
+Stray returns and the edges of data gaps pull least-squares slopes around, so
+there are robust estimators with the same batched interface:
+grouped_theil_sen (median of pairwise slopes, from a bounded random sample of
+pairs per group), grouped_huber (iteratively reweighted least squares) and
+grouped_ransac (best two-point line, refit on its inliers). Pick one with
+slope_table(..., method="theil_sen").
+"""
+from typing import Mapping, Optional
+import numpy as np
+import pandas as pd
+
+SLOPE_COLUMNS = ["slope", "intercept", "r", "stderr", "n"]
+
+# scale factor that makes the MAD a consistent estimate of a normal sigma
+_MAD_SCALE = 1.4826
+
+
+def grouped_linregress(
+    x: np.ndarray,
+    y: np.ndarray,
+    groups: np.ndarray,
+    n_groups: int
+) -> pd.DataFrame:
+    """Ordinary least-squares fit of y against x for every group in one pass.
+
+    Matches scipy.stats.linregress for each group: stderr is the standard error
+    of the slope and r is clipped to [-1, 1]. Groups with fewer than two points
+    or with identical x values get NaN slopes instead of raising.
+
+    Args:
+        x: independent variable, e.g. rotated_x
+        y: dependent variable, e.g. elevation_m
+        groups: integer group code in [0, n_groups) for every point
+        n_groups: number of groups
+
+    Returns:
+        pd.DataFrame indexed by group code with slope, intercept, r, stderr and n
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = np.bincount(groups, minlength=n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = np.bincount(groups, weights=x, minlength=n_groups) / n
+        y_mean = np.bincount(groups, weights=y, minlength=n_groups) / n
+
+        # centered second pass keeps the sums accurate far from the origin
+        dx = x - x_mean[groups]
+        dy = y - y_mean[groups]
+        sxx = np.bincount(groups, weights=dx * dx, minlength=n_groups)
+        syy = np.bincount(groups, weights=dy * dy, minlength=n_groups)
+        sxy = np.bincount(groups, weights=dx * dy, minlength=n_groups)
+
+        slope = sxy / sxx
+        intercept = y_mean - slope * x_mean
+        r = np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0)
+        r[(syy == 0) & (sxx > 0)] = 0.0
+        stderr = np.sqrt((1 - r ** 2) * syy / sxx / (n - 2))
+
+    slope[n < 2] = np.nan
+    intercept[n < 2] = np.nan
+    r[n < 2] = np.nan
+    stderr[n == 2] = 0.0
+    stderr[n < 2] = np.nan
+
+    return pd.DataFrame({
+        "slope": slope,
+        "intercept": intercept,
+        "r": r,
+        "stderr": stderr,
+        "n": n,
+    })
+
+
+def grouped_median(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of values within every group (NaN for empty groups), with one sort."""
+    values = np.asarray(values, dtype=np.float64)
+    order = np.lexsort((values, groups))
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    medians = np.full(n_groups, np.nan)
+    filled = counts > 0
+    low = starts[filled] + (counts[filled] - 1) // 2
+    high = starts[filled] + counts[filled] // 2
+    sorted_values = values[order]
+    medians[filled] = 0.5 * (sorted_values[low] + sorted_values[high])
+    return medians
+
+
+def _pair_sample(
+    groups: np.ndarray,
+    n_groups: int,
+    max_pairs: int,
+    rng: np.random.Generator
+):
+    """Index pairs (i, j), i != j, within each group, and the group of each pair.
+
+    Groups with at most max_pairs distinct pairs get every pair; larger groups
+    get max_pairs pairs drawn at random, which keeps the cost linear in the
+    number of points.
+    """
+    order = np.argsort(groups, kind="stable")
+    counts = np.bincount(groups, minlength=n_groups).astype(np.int64)
+    starts = np.cumsum(counts) - counts
+    all_pairs = counts * (counts - 1) // 2
+    exact = all_pairs <= max_pairs
+    n_pairs = np.where(exact, all_pairs, max_pairs)
+
+    pair_groups = np.repeat(np.arange(n_groups), n_pairs)
+    n = counts[pair_groups]
+    first = np.empty(len(pair_groups), dtype=np.int64)
+    second = np.empty(len(pair_groups), dtype=np.int64)
+
+    # every pair of a small group: invert the row-major index k of the pair
+    # (i, j), i < j, in the upper triangle of an n x n matrix
+    in_exact = exact[pair_groups]
+    k = np.arange(len(pair_groups)) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+    k = k[in_exact]
+    n_exact = n[in_exact]
+    i = n_exact - 2 - np.floor(np.sqrt(-8.0 * k + 4.0 * n_exact * (n_exact - 1) - 7) / 2 - 0.5).astype(np.int64)
+    j = k + i + 1 - n_exact * (n_exact - 1) // 2 + (n_exact - i) * (n_exact - i - 1) // 2
+    first[in_exact] = i
+    second[in_exact] = j
+
+    # random distinct pairs from a large group
+    n_sampled = n[~in_exact]
+    i = (rng.random(len(n_sampled)) * n_sampled).astype(np.int64)
+    j = (rng.random(len(n_sampled)) * (n_sampled - 1)).astype(np.int64)
+    j += j >= i
+    first[~in_exact] = i
+    second[~in_exact] = j
+
+    offsets = starts[pair_groups]
+    return order[first + offsets], order[second + offsets], pair_groups
+
+
+def _robust_table(slope: np.ndarray, intercept: np.ndarray, n: np.ndarray) -> pd.DataFrame:
+    """Fit table in the grouped_linregress layout, without r and stderr."""
+    defined = (n >= 2) & np.isfinite(slope)
+    return pd.DataFrame({
+        "slope": np.where(defined, slope, np.nan),
+        "intercept": np.where(defined, intercept, np.nan),
+        "r": np.full(len(n), np.nan),
+        "stderr": np.full(len(n), np.nan),
+        "n": n,
+    })
+
+
+def grouped_theil_sen(
+    x: np.ndarray,
+    y: np.ndarray,
+    groups: np.ndarray,
+    n_groups: int,
+    max_pairs: int = 20_000,
+    seed: int = 0
+) -> pd.DataFrame:
+    """Theil-Sen fit of y against x for every group.
+
+    The slope is the median of the pairwise slopes and the intercept
+    median(y) - slope * median(x), both as in scipy.stats.theilslopes. A group with more than max_pairs pairs of points uses a
+    random sample of max_pairs pairs, so a 10^5 point zone costs about the same
+    as a 200 point one. At the default size the sampling error is on the order
+    of the slope's own statistical uncertainty. r and stderr are NaN.
+
+    Args:
+        x, y, groups, n_groups: see grouped_linregress
+        max_pairs: pairs of points used per group
+        seed: random seed for the pair sample
+
+    Returns:
+        pd.DataFrame indexed by group code with slope, intercept, r, stderr and n
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = np.bincount(groups, minlength=n_groups)
+    first, second, pair_groups = _pair_sample(groups, n_groups, max_pairs, np.random.default_rng(seed))
+
+    dx = x[second] - x[first]
+    valid = dx != 0
+    pair_slopes = (y[second] - y[first])[valid] / dx[valid]
+    slope = grouped_median(pair_slopes, pair_groups[valid], n_groups)
+    # median(y) - slope * median(x), as scipy.stats.theilslopes does by default
+    intercept = grouped_median(y, groups, n_groups) - slope * grouped_median(x, groups, n_groups)
+    return _robust_table(slope, intercept, n)
+
+
+def grouped_huber(
+    x: np.ndarray,
+    y: np.ndarray,
+    groups: np.ndarray,
+    n_groups: int,
+    epsilon: float = 1.345,
+    max_iter: int = 50,
+    tol: float = 1e-8
+) -> pd.DataFrame:
+    """Huber M-estimate of the line for every group, by iteratively reweighted least squares.
+
+    Residuals beyond epsilon times the group's (MAD) residual scale are
+    down-weighted by epsilon * scale / |residual|. Every iteration is one
+    weighted grouped_linregress-style pass over all groups. r and stderr are NaN.
+
+    Args:
+        x, y, groups, n_groups: see grouped_linregress
+        epsilon: Huber threshold in units of the residual scale
+        max_iter: maximum reweighting iterations
+        tol: stop once no slope changes by more than this
+
+    Returns:
+        pd.DataFrame indexed by group code with slope, intercept, r, stderr and n
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = np.bincount(groups, minlength=n_groups)
+    fits = grouped_linregress(x, y, groups, n_groups)
+    slope = fits.slope.to_numpy()
+    intercept = fits.intercept.to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(max_iter):
+            residual = y - (intercept[groups] + slope[groups] * x)
+            scale = _MAD_SCALE * grouped_median(np.abs(residual), groups, n_groups)
+            limit = epsilon * scale[groups]
+            weights = np.where(np.abs(residual) <= limit, 1.0, limit / np.abs(residual))
+            weights[~np.isfinite(weights)] = 1.0
+
+            w_sum = np.bincount(groups, weights=weights, minlength=n_groups)
+            x_mean = np.bincount(groups, weights=weights * x, minlength=n_groups) / w_sum
+            y_mean = np.bincount(groups, weights=weights * y, minlength=n_groups) / w_sum
+            dx = x - x_mean[groups]
+            dy = y - y_mean[groups]
+            sxx = np.bincount(groups, weights=weights * dx * dx, minlength=n_groups)
+            sxy = np.bincount(groups, weights=weights * dx * dy, minlength=n_groups)
+            new_slope = sxy / sxx
+            new_intercept = y_mean - new_slope * x_mean
+
+            change = np.nanmax(np.abs(new_slope - slope), initial=0.0)
+            slope, intercept = new_slope, new_intercept
+            if change <= tol:
+                break
+    return _robust_table(slope, intercept, n)
+
+
+def grouped_ransac(
+    x: np.ndarray,
+    y: np.ndarray,
+    groups: np.ndarray,
+    n_groups: int,
+    residual_threshold: float = 0.25,
+    n_trials: int = 100,
+    seed: int = 0
+) -> pd.DataFrame:
+    """RANSAC line for every group, refit by least squares on its inliers.
+
+    Each trial draws one random pair of points per group and counts the points
+    within residual_threshold of the line through them; every trial covers all
+    groups at once. The line with the most inliers in a group is refit on those
+    inliers with grouped_linregress, so r and stderr describe the inlier fit
+    while n is still the size of the group.
+
+    Args:
+        x, y, groups, n_groups: see grouped_linregress
+        residual_threshold: largest |residual| (in y units, meters) of an inlier
+        n_trials: random pairs tried per group
+        seed: random seed for the pair draws
+
+    Returns:
+        pd.DataFrame indexed by group code with slope, intercept, r, stderr and n
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = np.bincount(groups, minlength=n_groups)
+    if len(x) == 0:
+        return grouped_linregress(x, y, groups, n_groups)
+    rng = np.random.default_rng(seed)
+    order = np.argsort(groups, kind="stable")
+    starts = np.cumsum(n) - n
+    has_pairs = n >= 2
+
+    best_count = np.full(n_groups, -1)
+    best_slope = np.full(n_groups, np.nan)
+    best_intercept = np.full(n_groups, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(n_trials):
+            i = (rng.random(n_groups) * n).astype(np.int64)
+            j = (rng.random(n_groups) * (n - 1)).astype(np.int64)
+            j += j >= i
+            i = order[np.minimum(starts + i, len(order) - 1)]
+            j = order[np.minimum(starts + j, len(order) - 1)]
+            trial_slope = (y[j] - y[i]) / (x[j] - x[i])
+            trial_intercept = y[i] - trial_slope * x[i]
+
+            inlier = np.abs(y - (trial_intercept[groups] + trial_slope[groups] * x)) <= residual_threshold
+            count = np.bincount(groups, weights=inlier, minlength=n_groups)
+            better = has_pairs & np.isfinite(trial_slope) & (count > best_count)
+            best_count[better] = count[better]
+            best_slope[better] = trial_slope[better]
+            best_intercept[better] = trial_intercept[better]
+
+        inlier = np.abs(y - (best_intercept[groups] + best_slope[groups] * x)) <= residual_threshold
+    fits = grouped_linregress(x[inlier], y[inlier], groups[inlier], n_groups)
+    fits["n"] = n
+    return fits
+
+
+SLOPE_METHODS = {
+    "ols": grouped_linregress,
+    "theil_sen": grouped_theil_sen,
+    "huber": grouped_huber,
+    "ransac": grouped_ransac,
+}
+
+
+def slope_table(
+    df: pd.DataFrame,
+    zones: Optional[Mapping[str, np.ndarray]] = None,
+    by: Optional[str] = "transect_id",
+    x: str = "rotated_x",
+    y: str = "elevation_m",
+    method: str = "ols",
+    **method_kwargs
+) -> pd.DataFrame:
+    """Linear fit of elevation against cross-shore distance per transect and zone.
+
+    Zones may overlap (the surf zone contains the bar, for example), so each
+    zone is given as its own boolean mask over df. Every zone is still fit for
+    all transects at once.
+
+        zones = {
+            "beach": (df.rotated_x > -35) & (df.rotated_x < 78),
+            "surf": (df.rotated_x > -10) & (df.rotated_x < 800),
+        }
+        slopes = slope_table(df, zones)
+
+    Args:
+        df: transect frame from build_transects
+        zones: zone name -> boolean mask over df rows, default fits all rows as "all"
+        by: column to group by within each zone, None pools every transect
+        x: column to use as the independent variable
+        y: column to use as the dependent variable
+        method: "ols" (linregress), "theil_sen", "huber" or "ransac"
+        **method_kwargs: passed to the estimator, e.g. residual_threshold for ransac
+
+    Returns:
+        pd.DataFrame with a row per (by, zone) pair that has any points and
+        columns by, zone, slope, intercept, r, stderr, n
+    """
+    if method not in SLOPE_METHODS:
+        raise ValueError(f"unknown slope method {method!r}, expected one of {sorted(SLOPE_METHODS)}")
+    estimator = SLOPE_METHODS[method]
+    if zones is None:
+        zones = {"all": np.ones(len(df), dtype=bool)}
+
+    if by is None:
+        codes = np.zeros(len(df), dtype=np.intp)
+        labels = np.zeros(1, dtype=np.intp)
+    else:
+        codes, labels = pd.factorize(df[by], sort=True)
+    x_values = df[x].to_numpy()
+    y_values = df[y].to_numpy()
+
+    tables = []
+    for zone, mask in zones.items():
+        mask = np.asarray(mask, dtype=bool)
+        fits = estimator(x_values[mask], y_values[mask], codes[mask], len(labels), **method_kwargs)
+        if by is not None:
+            fits.insert(0, by, labels)
+        fits.insert(0 if by is None else 1, "zone", zone)
+        tables.append(fits.loc[fits.n > 0])
+
+    table = pd.concat(tables, ignore_index=True)
+    table["zone"] = pd.Categorical(table["zone"], categories=list(zones))
+    return table
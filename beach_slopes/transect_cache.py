@@ -0,0 +1,198 @@
+"""
+On-disk cache of build_transects output.
+
+Reading and rotating a full survey takes minutes, while the transects we keep
+from it are a few MB. load_transects stores the transect frame as an
+uncompressed .npz (one array per column) keyed by the LAS file contents and
+every parameter that shapes the transects, and reuses it on the next run, so
+tweaking a plot no longer means reloading the LiDAR.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+from .coordinates import transform_coordinates
+from .lidar_io import PointFilter, RotatedWindow, import_lidar_las
+from .transects import build_transects
+
+# bump when the cached frame layout or build_transects semantics change
+CACHE_VERSION = 1
+
+_HASH_BLOCK_SIZE = 8 * 1024 * 1024
+_HASH_INDEX = "file_hashes.json"
+
+
+def _default_cache_dir(las_filename: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(las_filename)), "transect_cache")
+
+
+def _read_hash_index(index_path: str) -> dict:
+    """Hash index in cache_dir; a missing or unreadable index counts as empty."""
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+
+def las_file_hash(las_filename: str, cache_dir: str) -> str:
+    """Content hash of a LAS file, remembered by path, size and mtime.
+
+    Hashing a multi-GB survey takes a while, so the digest is stored in
+    cache_dir and only recomputed when the file's size or mtime changes. The
+    index is replaced atomically, so batch workers sharing a cache_dir never
+    see it half-written; at worst one of them hashes a file again.
+    """
+    path = os.path.abspath(las_filename)
+    stat = os.stat(path)
+    index_path = os.path.join(cache_dir, _HASH_INDEX)
+    index = _read_hash_index(index_path)
+
+    entry = index.get(path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["digest"]
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+
+    # re-read just before writing so entries other workers added meanwhile are kept
+    index = _read_hash_index(index_path)
+    index[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".json", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return digest.hexdigest()
+
+
+def transect_cache_path(
+    las_filename: str,
+    new_origin_north: float,
+    new_origin_east: float,
+    theta_deg: float,
+    y_min: float,
+    y_max: float,
+    y_transect_width: float,
+    y_transect_gap: float,
+    cache_dir: Optional[str] = None,
+    point_filter: Optional[PointFilter] = None
+) -> str:
+    """Path of the cache file for one LAS file and set of transect parameters."""
+    if cache_dir is None:
+        cache_dir = _default_cache_dir(las_filename)
+    key = [
+        CACHE_VERSION,
+        las_file_hash(las_filename, cache_dir),
+        float(new_origin_north),
+        float(new_origin_east),
+        float(theta_deg),
+        float(y_min),
+        float(y_max),
+        float(y_transect_width),
+        float(y_transect_gap),
+    ]
+    # only filtered runs get the extra key, so existing unfiltered entries stay valid
+    if point_filter is not None:
+        key.append([
+            sorted(point_filter.classifications) if point_filter.classifications is not None else None,
+            sorted(point_filter.return_numbers) if point_filter.return_numbers is not None else None,
+            point_filter.last_return_only,
+            point_filter.drop_withheld,
+            point_filter.drop_overlap,
+        ])
+    key = json.dumps(key)
+    name = hashlib.sha1(key.encode()).hexdigest()[:20]
+    return os.path.join(cache_dir, f"transects_{name}.npz")
+
+
+def save_transects(df: pd.DataFrame, path: str) -> None:
+    """Write a transect frame to path as one .npz array per column.
+
+    The file is written next to its final location and renamed into place, so
+    an interrupted run never leaves a half-written cache entry behind.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **{column: df[column].to_numpy() for column in df.columns})
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def read_transects(path: str) -> pd.DataFrame:
+    """Read a transect frame written by save_transects."""
+    with np.load(path) as data:
+        return pd.DataFrame({column: data[column] for column in data.files})
+
+
+def load_transects(
+    las_filename: str,
+    new_origin_north: float,
+    new_origin_east: float,
+    theta_deg: float,
+    y_min: float,
+    y_max: float,
+    y_transect_width: float,
+    y_transect_gap: float,
+    cache_dir: Optional[str] = None,
+    refresh: bool = False,
+    point_filter: Optional[PointFilter] = None
+) -> pd.DataFrame:
+    """build_transects output for a LAS file, from the cache when possible.
+
+    On a cache miss the LAS file is read with the transect window pushed down
+    into the reader, rotated with transform_coordinates, cut with
+    build_transects and saved for next time. Any change to the LAS file or the
+    parameters below produces a different cache entry.
+
+    Args:
+        las_filename: path to .las or .laz file to load
+        new_origin_north: location (in UTM) ideally along the shoreline
+        new_origin_east: location (in UTM) ideally along the shoreline
+        theta_deg: the angle that the shoreline sits at - degrees from true north
+        y_min: the minimum y coordinate that you want included in your beach section
+        y_max: the maximum y coordinate that you want included in your beach section
+        y_transect_width: how wide (in meters) do you want the transects to be?
+        y_transect_gap: how much space (in meters) between transects?
+        cache_dir: where cache files live, default is transect_cache/ next to the LAS file
+        refresh: rebuild the transects even if a cache entry exists
+        point_filter: only keep the returns it selects (part of the cache key)
+
+    Returns:
+        pd.DataFrame with easting, northing, elevation_m, rotated_x, rotated_y
+        and transect_id columns, sorted by transect_id then rotated_x
+    """
+    path = transect_cache_path(
+        las_filename, new_origin_north, new_origin_east, theta_deg,
+        y_min, y_max, y_transect_width, y_transect_gap, cache_dir, point_filter,
+    )
+    if os.path.exists(path) and not refresh:
+        return read_transects(path)
+
+    window = RotatedWindow(
+        new_origin_north, new_origin_east, theta_deg,
+        y_min=y_min, y_max=y_max + y_transect_width,
+    )
+    df = import_lidar_las(las_filename, rotated_window=window, point_filter=point_filter)
+    df = transform_coordinates(df, new_origin_north, new_origin_east, theta_deg)
+    transects_df = build_transects(df, y_min, y_max, y_transect_width, y_transect_gap)
+    transects_df = transects_df.reset_index(drop=True)
+
+    save_transects(transects_df, path)
+    return transects_df
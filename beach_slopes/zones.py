@@ -0,0 +1,150 @@
+"""
+Declarative cross-shore zones (beach, surf zone, bar, ...) for transect data.
+
+A zone is a named cross-shore range and/or elevation range. All zones in a
+spec are evaluated together: rotated_x and elevation_m are each looked up once
+against the sorted zone edges, and a small lookup table turns the result into
+one bit per zone. Zones may overlap, so the primary output is that bitmask;
+zone_masks and zone_column turn it into per-zone boolean masks (for
+slope_table) or a single categorical column (for groupby and plotting)
+without copying the transect frame.
+"""
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+
+class Zone(NamedTuple):
+    """A named zone; ranges are open intervals and None means unbounded."""
+    name: str
+    x_range: Optional[Tuple[float, float]] = None
+    elevation_range: Optional[Tuple[float, float]] = None
+
+
+# Sandy beach anatomy used in the pmaaa figures, with rotated_x mirrored so
+# that cross-shore distance increases offshore
+SANDY_BEACH_ZONES = [
+    Zone("beach", x_range=(-35, 78)),
+    Zone("beach2", elevation_range=(-1, 1.1)),  # tidal range of +- 1m
+    Zone("surf", x_range=(-10, 800)),
+    Zone("surf2", x_range=(0, 280)),  # out to bbar
+    Zone("bar", x_range=(190, 350)),
+    Zone("littoral", x_range=(0, 1200)),
+]
+
+
+def _bit_dtype(n_zones: int):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n_zones <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"at most 64 zones are supported, got {n_zones}")
+
+
+def _range_lookup(values: np.ndarray, ranges: Sequence[Optional[Tuple[float, float]]], dtype):
+    """Per-value bitmask of the open ranges each value falls in.
+
+    Every value is classified once against the sorted range edges: class 2i
+    lies strictly between edges i-1 and i, class 2i+1 sits exactly on edge i.
+    A lookup table of 2*len(edges)+1 entries maps each class to its zone bits.
+    """
+    edges = np.unique([edge for bounds in ranges if bounds is not None for edge in bounds])
+    edges = edges[np.isfinite(edges)]
+
+    # a representative value for every class, in class order
+    if len(edges):
+        padded = np.concatenate(([edges[0] - 1.0], edges, [edges[-1] + 1.0]))
+    else:
+        padded = np.zeros(2)
+    representatives = np.empty(2 * len(edges) + 1)
+    representatives[0::2] = (padded[:-1] + padded[1:]) / 2
+    representatives[1::2] = edges
+
+    lookup = np.zeros(len(representatives), dtype=dtype)
+    unbounded = dtype(0)
+    for bit, bounds in enumerate(ranges):
+        if bounds is None:
+            lookup |= dtype(1) << dtype(bit)
+            unbounded |= dtype(1) << dtype(bit)
+        else:
+            inside = (representatives > bounds[0]) & (representatives < bounds[1])
+            lookup[inside] |= dtype(1) << dtype(bit)
+
+    classes = np.searchsorted(edges, values, side="left")
+    classes += np.searchsorted(edges, values, side="right")
+    bits = lookup[classes]
+    # NaN only satisfies zones that don't constrain this value at all
+    bits[np.isnan(values)] = unbounded
+    return bits
+
+
+def zone_bits(
+    df: pd.DataFrame,
+    zones: Sequence[Zone] = SANDY_BEACH_ZONES,
+    x: str = "rotated_x",
+    elevation: str = "elevation_m"
+) -> np.ndarray:
+    """Bitmask of the zones every row of df falls in; bit i is zones[i].
+
+    Args:
+        df: transect frame with rotated_x and elevation_m columns
+        zones: zone spec, at most 64 zones
+        x: cross-shore column the x ranges apply to
+        elevation: column the elevation ranges apply to
+
+    Returns:
+        unsigned integer array (the narrowest that fits the zones), one per row
+    """
+    dtype = _bit_dtype(len(zones))
+    bits = _range_lookup(df[x].to_numpy(), [zone.x_range for zone in zones], dtype)
+    bits &= _range_lookup(df[elevation].to_numpy(), [zone.elevation_range for zone in zones], dtype)
+    return bits
+
+
+def zone_masks(
+    df: pd.DataFrame,
+    zones: Sequence[Zone] = SANDY_BEACH_ZONES,
+    bits: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """Boolean mask per zone name, e.g. to pass to slopes.slope_table.
+
+    Args:
+        df: transect frame with rotated_x and elevation_m columns
+        zones: zone spec
+        bits: output of zone_bits for df and zones, computed if not given
+
+    Returns:
+        dict of zone name -> boolean array over df rows
+    """
+    if bits is None:
+        bits = zone_bits(df, zones)
+    one = bits.dtype.type(1)
+    return {zone.name: (bits & (one << bits.dtype.type(i))) != 0 for i, zone in enumerate(zones)}
+
+
+def zone_column(
+    df: pd.DataFrame,
+    zones: Sequence[Zone] = SANDY_BEACH_ZONES,
+    bits: Optional[np.ndarray] = None
+) -> pd.Categorical:
+    """Single categorical zone label per row.
+
+    Where zones overlap a row gets the first matching zone in spec order, so
+    list narrow zones before the wide ones that contain them. Rows outside
+    every zone are NaN.
+
+    Args:
+        df: transect frame with rotated_x and elevation_m columns
+        zones: zone spec
+        bits: output of zone_bits for df and zones, computed if not given
+
+    Returns:
+        pd.Categorical with the zone names as categories
+    """
+    if bits is None:
+        bits = zone_bits(df, zones)
+    # index of the lowest set bit, -1 where no bit is set
+    lowest = bits & (~bits + bits.dtype.type(1))
+    codes = np.full(len(bits), -1, dtype=np.int8)
+    in_zone = lowest != 0
+    codes[in_zone] = np.log2(lowest[in_zone]).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=[zone.name for zone in zones])
@@ -16,6 +16,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from osgeo import gdal, osr
 
+from beach_slopes.reprojection import reproject
+
 
 # Import Data
 ds = gdal.Open('Data/socal_coned_Job822412/Job822412_socal_coned.tif', gdal.GA_ReadOnly)
@@ -52,9 +54,11 @@ miny = gt[3] + width*gt[4] + height*gt[5]
 maxx = gt[0] + width*gt[1] + height*gt[2]
 maxy = gt[3] 
 
-transform = osr.CoordinateTransformation(old_cs,new_cs)
-latlon = transform.TransformPoint(minx,miny)
-print(latlon)
+# reproject all four corners in one call instead of TransformPoint per point
+corner_x = np.array([minx, maxx, maxx, minx])
+corner_y = np.array([miny, miny, maxy, maxy])
+lon, lat = reproject(corner_x, corner_y, ds.GetProjectionRef(), new_cs.ExportToWkt())
+print(np.column_stack((lon, lat)))
 
 print(data)
 #data = np.where((data < 50) & (data > -100))
@@ -10,32 +10,12 @@ coordinate system using rotation trig
 """
 from typing import List
 import numpy as np
-import laspy
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.stats import linregress
 
-def import_lidar_las(filename: str) -> pd.DataFrame:
-    """Load lidar (.las) point data in UTM coordinates.
-    
-    This file should be in UTM coordinates and NAVD88 vertical coordinates, which should
-    be in meters. Data portal: NOAA Data Viewer website.
-
-    Args:
-        filename: path to .las file to load
-
-    Returns:
-        pd.DataFrame containing columns for:
-            easting: meters east of known origin
-            northing: meters north of known origin
-            elevation_m: height above or below ground
-    """
-    las = laspy.read(filename)
-    coords = np.vstack((las.x, las.y, las.z)).transpose()
-    df = pd.DataFrame(coords, columns=["easting", "northing", "elevation_m"])
-
-    return df
-
+from beach_slopes.lidar_io import BARE_EARTH_CLASSES, PointFilter, RotatedWindow
+from beach_slopes.lidar_tiles import import_lidar_tiles
 
 def transform_coordinates(
     df: pd.DataFrame,
@@ -161,10 +141,15 @@ def plot_x_depth_transects(
 #####################################################################
 
 
-#df = import_lidar_las(
-#    '/Users/rdchlcap/repos/beachslopes/data/lejeune/2014_NGS_postSandy_topobathy_Job836807/Job836807_34077_57_25.las')
-df = import_lidar_las(
-    '/Users/rdchlcap/repos/beachslopes/data/lejeune/2014_NGS_postSandy_topobathy_Job836807/Job836807_34077_55_29.las')
+# reads only the tiles (e.g. Job836807_34077_55_29.las, Job836807_34077_57_25.las)
+# that overlap the beach slice, so a beach across a tile boundary needs no juggling
+df = import_lidar_tiles(
+    '/Users/rdchlcap/repos/beachslopes/data/lejeune/2014_NGS_postSandy_topobathy_Job836807',
+    # only keep the beach slice (rotated_x > 0, 1000 < rotated_y < 2200) while reading
+    rotated_window=RotatedWindow(new_origin_north=3825700, new_origin_east=289000, theta_deg=305,
+                                 x_min=0, y_min=1000, y_max=2200),
+    # topobathy: drop water surface, noise and vegetation returns while reading
+    point_filter=PointFilter(classifications=BARE_EARTH_CLASSES))
 
 print(df)
 df = transform_coordinates(df, new_origin_north= 3825700, new_origin_east= 289000, theta_deg=305)
@@ -172,8 +157,6 @@ df = transform_coordinates(df, new_origin_north= 3825700, new_origin_east= 28900
 #test plots
 #plt.scatter(df['easting'], df['northing'],c = df['elevation_m'])
 # plt.show()
-slice = (df.rotated_x > 0) & (df.rotated_y > 1000) & (df.rotated_y < 2200)
-df = df.loc[slice,:]
 
 plt.scatter(df['rotated_x'], df['rotated_y'],c = df['elevation_m'])
 plt.show()
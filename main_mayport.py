@@ -10,32 +10,11 @@ coordinate system using rotation trig
 """
 from typing import List
 import numpy as np
-import laspy
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.stats import linregress
 
-def import_lidar_las(filename: str) -> pd.DataFrame:
-    """Load lidar (.las) point data in UTM coordinates.
-    
-    This file should be in UTM coordinates and NAVD88 vertical coordinates, which should
-    be in meters. Data portal: NOAA Data Viewer website.
-
-    Args:
-        filename: path to .las file to load
-
-    Returns:
-        pd.DataFrame containing columns for:
-            easting: meters east of known origin
-            northing: meters north of known origin
-            elevation_m: height above or below ground
-    """
-    las = laspy.read(filename)
-    coords = np.vstack((las.x, las.y, las.z)).transpose()
-    df = pd.DataFrame(coords, columns=["easting", "northing", "elevation_m"])
-
-    return df
-
+from beach_slopes.lidar_io import RotatedWindow, import_lidar_las
 
 def transform_coordinates(
     df: pd.DataFrame,
@@ -163,8 +142,22 @@ def plot_x_depth_transects(
 
 #df = import_lidar_las(
 #    '/Users/rdchlcap/repos/beachslopes/data/lejeune/2014_NGS_postSandy_topobathy_Job836807/Job836807_34077_57_25.las')
+mayport_las = '/Users/rdchlcap/repos/beachslopes/data/mayport/fl2016_usace_ncmp_fl_east_cst_Job837349/fl2016_usace_ncmp_fl_east_cst_Job837349.las'
+
+# the regression slice (-74 < rotated_x < 25 at any alongshore distance) and the
+# transects (600 < rotated_y < 1000) are different windows, so each is read with
+# its own window instead of loading the whole survey and masking it twice
+df_slice = import_lidar_las(
+    mayport_las,
+    rotated_window=RotatedWindow(new_origin_north=3361800, new_origin_east=462000, theta_deg=336,
+                                 x_min=-74, x_max=25),
+    elevation_range=(-2.5, 2.5))
+df_slice = transform_coordinates(df_slice, new_origin_north= 3361800, new_origin_east= 462000 , theta_deg=336)
+
 df = import_lidar_las(
-    '/Users/rdchlcap/repos/beachslopes/data/mayport/fl2016_usace_ncmp_fl_east_cst_Job837349/fl2016_usace_ncmp_fl_east_cst_Job837349.las')
+    mayport_las,
+    rotated_window=RotatedWindow(new_origin_north=3361800, new_origin_east=462000, theta_deg=336,
+                                 y_min=600, y_max=1000 + 1))
 
 print(df)
 df = transform_coordinates(df, new_origin_north= 3361800, new_origin_east= 462000 , theta_deg=336)
@@ -178,8 +171,9 @@ df = transform_coordinates(df, new_origin_north= 3361800, new_origin_east= 46200
 # plt.grid()
 # plt.savefig('/Users/rdchlcap/repos/beachslopes/figures/mayport_figures/beacharea_rotated3.png', dpi = 200)
 # ACTB Beach
-slice = (df.elevation_m > -2.5) & (df.elevation_m < 2.5  ) & (df.rotated_x > -74) & (df.rotated_x < 25  )
-dfslice = df.loc[slice,:] 
+# the windows above are inclusive, the slice is not
+slice = (df_slice.elevation_m > -2.5) & (df_slice.elevation_m < 2.5  ) & (df_slice.rotated_x > -74) & (df_slice.rotated_x < 25  )
+dfslice = df_slice.loc[slice,:] 
 tot_slope, tot_intercept, r, p, se = linregress(dfslice.rotated_x, dfslice.elevation_m)
 
 df_actb = build_transects(df, y_min=600, y_max=1000, y_transect_width=1, y_transect_gap=50)
@@ -1,50 +1,45 @@
-from typing import List
 import numpy as np
-import laspy
-import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.stats import linregress
-from scipy.interpolate import make_interp_spline, interp1d
 import matplotlib.patches as mpatches
 
-import main_refactor
+from beach_slopes import transect_cache
+from beach_slopes.profiles import grid_profiles, smooth_profiles
+from beach_slopes.slopes import slope_table
+from beach_slopes.zones import SANDY_BEACH_ZONES, zone_masks
 
 def slope(x1, y1, x2, y2):
     return (y2-y1)/(x2-x1)
 
-df = main_refactor.import_lidar_las('/Users/rdchlcap/repos/beachslopes/data/pendleton/ca2014_usace_ncmp_ca_Job821632/ca2014_usace_ncmp_ca_Job821632.las')
-df = main_refactor.transform_coordinates(df, new_origin_north=3678000, new_origin_east=460000 + 500, theta_deg=35)
-
 plot_infograph = False
 plot_slopes = False
 
 # Northern beach by 7000-7500 where there aren't data gaps
-df_red = main_refactor.build_transects(df,y_min = 7100, y_max = 7400, y_transect_width=1, y_transect_gap= 20)
+# (cached after the first run, so plot tweaks don't reload the LiDAR)
+df_red = transect_cache.load_transects(
+    '/Users/rdchlcap/repos/beachslopes/data/pendleton/ca2014_usace_ncmp_ca_Job821632/ca2014_usace_ncmp_ca_Job821632.las',
+    new_origin_north=3678000, new_origin_east=460000 + 500, theta_deg=35,
+    y_min = 7100, y_max = 7400, y_transect_width=1, y_transect_gap= 20)
 
 #mirror x axis so cross-shore distance increases offshore
 df_red['rotated_x'] = df_red['rotated_x']*-1
 
-is_beach = (df_red.rotated_x > -35) & (df_red.rotated_x < 78)
-is_beach2 = (df_red.elevation_m < 1.1) & (df_red.elevation_m > -1) # tidal range of +- 1m
-is_surf = (df_red.rotated_x > -10) & (df_red.rotated_x < 800)
-is_surf2 = (df_red.rotated_x > 0) & (df_red.rotated_x < 280) # out to bbar
-is_bar = (df_red.rotated_x > 190) & (df_red.rotated_x < 350)
-is_littoral = (df_red.rotated_x > 0) & (df_red.rotated_x < 1200)
-#is_nearshore
-
-beach = df_red.loc[is_beach,:]
-beach2 = df_red.loc[is_beach2,:]
-surf = df_red.loc[is_surf, :]
-surf2 = df_red.loc[is_surf2, :]
-bar = df_red.loc[is_bar,:]
-littoral = df_red.loc[is_littoral]
-
-beach_slope, beach_intercept, r, p, se = linregress(beach.rotated_x, beach.elevation_m)
-beach_slope2, beach_intercept2, r, p, se = linregress(beach2.rotated_x, beach2.elevation_m)
-surf_slope, surf_intercept, r, p, se = linregress(surf.rotated_x, surf.elevation_m)
-surf_slope2, surf_intercept2, r, p, se = linregress(surf2.rotated_x, surf2.elevation_m)
-bar_slope, bar_intercept, r, p, se = linregress(bar.rotated_x, bar.elevation_m)
-litt_slope, litt_intercept, r, p, se = linregress(littoral.rotated_x,littoral.elevation_m)
+# beach, beach2 (tidal range), surf, surf2 (out to bbar), bar and littoral zones
+# evaluated in one pass and fit together instead of six masked copies of the frame
+zones = zone_masks(df_red, SANDY_BEACH_ZONES)
+zone_fits = slope_table(df_red, zones, by=None).set_index('zone')
+
+beach_slope, beach_intercept = zone_fits.loc['beach', ['slope', 'intercept']]
+beach_slope2, beach_intercept2 = zone_fits.loc['beach2', ['slope', 'intercept']]
+surf_slope, surf_intercept = zone_fits.loc['surf', ['slope', 'intercept']]
+surf_slope2, surf_intercept2 = zone_fits.loc['surf2', ['slope', 'intercept']]
+bar_slope, bar_intercept = zone_fits.loc['bar', ['slope', 'intercept']]
+litt_slope, litt_intercept = zone_fits.loc['littoral', ['slope', 'intercept']]
+
+# every transect interpolated onto a 0.5 m cross-shore grid (not across gaps
+# wider than 5 m) and smoothed over 5 m of distance
+# (instead of a rolling mean over 10 rows, whatever distance those span)
+profiles = smooth_profiles(
+    grid_profiles(df_red, spacing=0.5, method="linear", max_gap=5.0), window=5.0)
 
 
 plot_slopes = False
@@ -71,10 +66,9 @@ if plot_slopes:
     transect_df = df.loc[is_transect, :]
     # plt.plot(transect_df.rotated_x, transect_df.elevation_m, color = 'black')
 
-    #smooth line plot with a rolling average
-    rolling=transect_df[['rotated_x', 'elevation_m']].rolling(10).mean()
+    #smooth line plot with a 5 m moving average
     #plt.plot(transect_df.rotated_x, transect_df.elevation_m, color = 'red') #actual data
-    plt.plot(rolling.rotated_x, rolling.elevation_m, color = 'black') #smoothed line
+    plt.plot(profiles.x, profiles.elevation[profiles.row(transect_id)], color = 'black') #smoothed line
 
     # all_rolling=df[['rotated_x', 'elevation_m']].sort_values('rotated_x').rolling(20).mean()
     # plt.plot(all_rolling.rotated_x, all_rolling.elevation_m, color = 'black')
@@ -116,13 +110,12 @@ if plot_infograph:
     # plt.grid(which='minor', linestyle=':', linewidth='0.5', color='black')
 
 
-    #plot just one transect *smoothed with a rolling average
+    #plot just one transect *smoothed with a moving average
     transect_id = 2
     is_transect = df.transect_id == transect_id
     transect_df = df.loc[is_transect, :]
-    rolling=transect_df[['rotated_x', 'elevation_m']].rolling(10).mean()
     #plt.plot(transect_df.rotated_x, transect_df.elevation_m, color = 'red') #actual data
-    plt.plot(rolling.rotated_x, rolling.elevation_m, color = 'black') #smoothed line
+    plt.plot(profiles.x, profiles.elevation[profiles.row(transect_id)], color = 'black') #smoothed line
 
     #plot tidal info
     msl_x = [1000,-100]